@@ -0,0 +1,208 @@
+#! /usr/bin/env python3
+"""
+Benchmark the computation of pi and e by binary splitting in
+``littlecalc.dmath``.
+
+The first table compares the simple iterations used for small precisions
+(Gauss-Legendre for pi, the fixed-point Taylor series for e) with binary
+splitting. The smallest measured precision from which on binary splitting
+stays faster is reported as crossover, ``dmath.PI_BINARY_SPLITTING_THRESHOLD``
+and ``dmath.E_BINARY_SPLITTING_THRESHOLD`` should be set accordingly.
+
+The second table compares the original implementations of the
+``constants`` module (Decimal loops using ``**0.5`` for square roots) with
+``dmath.compute_pi`` and ``dmath.compute_e``. The original implementations
+run in a child process which is stopped after ``--timeout`` seconds. Their
+time is then estimated from the two largest precisions measured, assuming
+it grows like a power of the precision. Results of both variants are
+checked to agree.
+
+Usage: python benchmarks/bench_binary_splitting.py [--digits N [N ...]]
+                                                   [--timeout SECONDS]
+"""
+
+import argparse
+import decimal
+import math
+import os
+import subprocess
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)  # run from a checkout without installing
+
+from littlecalc import dmath
+
+
+def pi_original():
+    """The original computation of pi (``constants.calc_pi``)."""
+    D = decimal.Decimal
+    with decimal.localcontext() as ctx:
+        ctx.prec += 5  # increase precision for intermediate steps
+
+        const_0p5 = D('0.5')
+
+        # Gauss-Legendre algorithm
+        an, bn, tn, pn = D(1), 1 / D(2)**const_0p5, 1 / D(4), 1
+        v, lastv = 0, 1
+        while v != lastv:
+            a, b, t, p = an, bn, tn, pn
+
+            an = (a + b) / 2
+            bn = (a * b)**const_0p5
+            tn = t - p * (a - an)**2
+            pn = 2 * p
+
+            lastv = v
+            v = (an + bn)**2 / (4 * tn)
+
+    return +v  # round back to previous precision
+
+
+def e_original():
+    """The original computation of e (``constants.calc_e``)."""
+    D = decimal.Decimal
+    with decimal.localcontext() as ctx:
+        ctx.prec += 5
+        i, fact, num = 0, 1, D('1.0')
+        lasts, s = D('0'), D('1.0')
+        while s != lasts:
+            lasts = s
+            i += 1
+            fact *= i
+            s += num / fact
+    return +s  # rounding back to original precision
+
+
+CONSTANTS = {
+    # name: (original, simple, binary splitting, dispatching, crossover scan)
+    'pi': (pi_original, dmath.compute_pi_gauss_legendre,
+           dmath.compute_pi_chudnovsky, dmath.compute_pi,
+           [5, 10, 15, 20, 25, 30, 50, 100]),
+    'e': (e_original, dmath.compute_e_taylor,
+          dmath.compute_e_binary_splitting, dmath.compute_e,
+          [500, 800, 1000, 1100, 1200, 1300, 1500, 2000, 3000]),
+}
+
+
+def _context(digits):
+    ctx = decimal.Context(prec=digits, Emax=decimal.MAX_EMAX,
+                          Emin=decimal.MIN_EMIN)
+    return decimal.localcontext(ctx)
+
+
+def measure(func, digits):
+    """Return the time of computing ``func`` to ``digits`` digits in
+    seconds (best of three)."""
+    with _context(digits):
+        timer = timeit.Timer(func)
+        number, _ = timer.autorange()
+        return min(timer.repeat(3, number)) / number
+
+
+def measure_original(name, digits, timeout):
+    """Return ``(value, seconds)`` of the original implementation of
+    ``name`` run in a child process or ``(None, None)`` after ``timeout``
+    seconds."""
+    try:
+        result = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--original', name,
+             str(digits)],
+            stdout=subprocess.PIPE, universal_newlines=True, check=True,
+            timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return None, None
+    seconds, value = result.stdout.split()
+    return decimal.Decimal(value), float(seconds)
+
+
+def run_original(name, digits):
+    """Entry point of the child process of ``measure_original``."""
+    with _context(digits):
+        start = timeit.default_timer()
+        value = CONSTANTS[name][0]()
+        print(timeit.default_timer() - start, value)
+
+
+def compare_simple(names):
+    print('{:>4} {:>9} {:>12} {:>12} {:>9}'.format(
+        'name', 'digits', 'simple [ms]', 'split [ms]', 'speedup'))
+    crossover = {}
+    for name in names:
+        _, simple, split, _, scan = CONSTANTS[name]
+        faster = None
+        for digits in scan:
+            simple_time = measure(simple, digits)
+            split_time = measure(split, digits)
+            print('{:>4} {:>9} {:>12.4f} {:>12.4f} {:>8.1f}x'.format(
+                name, digits, simple_time * 1e3, split_time * 1e3,
+                simple_time / split_time))
+            if split_time >= simple_time:
+                faster = None
+            elif faster is None:
+                faster = digits
+        crossover[name] = faster
+
+    for name, digits in crossover.items():
+        print('{} crossover: {}'.format(
+            name, 'not reached' if digits is None
+            else '{} digits'.format(digits)))
+
+
+def compare_original(names, all_digits, timeout):
+    print('{:>4} {:>9} {:>14} {:>12} {:>10}'.format(
+        'name', 'digits', 'original [s]', 'new [s]', 'speedup'))
+    for name in names:
+        new = CONSTANTS[name][3]
+        measured = []  # (digits, seconds) of the original implementation
+        for digits in all_digits:
+            with _context(digits):
+                start = timeit.default_timer()
+                new_value = new()
+                new_time = timeit.default_timer() - start
+
+            old_value, old_time = measure_original(name, digits, timeout)
+            if old_value is not None:
+                with _context(digits - 2):
+                    if +old_value != +new_value:
+                        raise AssertionError(
+                            '{} differs at {} digits'.format(name, digits))
+                measured.append((digits, old_time))
+                print('{:>4} {:>9} {:>14.4f} {:>12.4f} {:>9.0f}x'.format(
+                    name, digits, old_time, new_time, old_time / new_time))
+            elif len(measured) >= 2:
+                (d1, t1), (d2, t2) = measured[-2:]
+                estimate = t2 * (digits / d2)**(math.log(t2 / t1) /
+                                                math.log(d2 / d1))
+                print('{:>4} {:>9} {:>14} {:>12.4f} {:>9.0f}x (estimated)'
+                      .format(name, digits, '~{:.3g}'.format(estimate),
+                              new_time, estimate / new_time))
+            else:
+                print('{:>4} {:>9} {:>14} {:>12.4f} {:>10}'.format(
+                    name, digits, '>{:g}'.format(timeout), new_time,
+                    '>{:.0f}x'.format(timeout / new_time)))
+
+
+def main():
+    if sys.argv[1:2] == ['--original']:
+        run_original(sys.argv[2], int(sys.argv[3]))
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--digits', type=int, nargs='+',
+                        default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--timeout', type=float, default=60,
+                        help='stop the original implementations after '
+                             'this many seconds (default: 60)')
+    parser.add_argument('--constants', nargs='+', choices=sorted(CONSTANTS),
+                        default=['pi', 'e'])
+    args = parser.parse_args()
+
+    compare_simple(args.constants)
+    print()
+    compare_original(args.constants, args.digits, args.timeout)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+#! /usr/bin/env python3
+"""
+Compare evaluating one expression per row using ``Calculator.parse_input``
+with ``littlecalc.columnar.evaluate_columns``.
+
+The target of about 20x the rows per second of ``parse_input`` applies to
+the float backend only. The decimal backend still performs one Decimal
+operation per row and operation, so it stays bounded by Decimal arithmetic
+(about 5x on the arithmetic expression used here).
+
+Usage: python benchmarks/bench_columnar.py [ROWS]
+"""
+
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)  # run from a checkout without installing
+
+from littlecalc import columnar
+from littlecalc.tui import TUICalculator, load_default_modules
+
+
+EXPRESSION = 'rcl a rcl b * 2 / rcl a sqr +'
+
+
+def bench_parse_input(calc, columns):
+    results = []
+    for a, b in zip(columns['a'], columns['b']):
+        calc.storage['a'] = calc.to_numeric(a)
+        calc.storage['b'] = calc.to_numeric(b)
+        calc.parse_input(EXPRESSION)
+        results.append(calc.stack.pop())
+    return results
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    calc = TUICalculator()
+    load_default_modules(calc)
+
+    rng = random.Random(1)
+    columns = {
+        'a': ['{:.6f}'.format(rng.uniform(-10, 10)) for _ in range(rows)],
+        'b': ['{:.6f}'.format(rng.uniform(-10, 10)) for _ in range(rows)],
+    }
+
+    timings = []
+    for name, func in [
+            ('parse_input', lambda: bench_parse_input(calc, columns)),
+            ('decimal', lambda: columnar.evaluate_columns(
+                calc, EXPRESSION, columns, 'decimal')),
+            ('float', lambda: columnar.evaluate_columns(
+                calc, EXPRESSION, columns, 'float'))]:
+        start = time.perf_counter()
+        func()
+        timings.append((name, time.perf_counter() - start))
+
+    base = timings[0][1]
+    print('{} rows, numpy: {}'.format(rows, columnar.numpy is not None))
+    for name, seconds in timings:
+        print('{:12} {:12.0f} rows/s {:8.1f}x'.format(
+            name, rows / seconds, base / seconds))
+
+
+if __name__ == '__main__':
+    main()
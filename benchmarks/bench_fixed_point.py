@@ -0,0 +1,104 @@
+#! /usr/bin/env python3
+"""
+Compare the series kernels summed using Decimals with their fixed-point
+counterparts (Python ints scaled by a power of two) at several precisions.
+
+The kernels are called with arguments as they occur after argument
+reduction. Results of both variants are checked to agree. For Euler's
+number the fixed-point Taylor series of ``dmath.compute_e_taylor`` is
+compared with the Decimal loop it replaced.
+
+Usage: python benchmarks/bench_fixed_point.py [--precisions N [N ...]]
+"""
+
+import argparse
+import decimal
+import math
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)  # run from a checkout without installing
+
+from littlecalc import dmath
+from littlecalc.modules.decimal import (
+    TRIPLING_FACTOR, _arctan_series_decimal, _arctan_series_fixed,
+    _sin_series_decimal, _sin_series_fixed)
+
+
+def e_decimal():
+    """The Decimal Taylor series formerly used for Euler's number."""
+    i, fact, num = 0, 1, decimal.Decimal(1)
+    lasts, s = 0, decimal.Decimal(1)
+    while s != lasts:
+        lasts = s
+        i += 1
+        fact *= i
+        s += num / fact
+    return s
+
+
+def sin_case(prec):
+    """Return the argument of the sine series after tripling and the number
+    of terms used by ``_sin_series``."""
+    x = decimal.Decimal(5) / 7 / 3**int(TRIPLING_FACTOR * math.sqrt(prec))
+    log_x = x.adjusted() + 1
+    terms, log_term = 0, 0.0
+    while log_term > -prec:
+        terms += 1
+        log_term += 2 * log_x - math.log10(2 * terms * (2 * terms + 1))
+    return x, terms
+
+
+def arctan_case(prec):
+    """Return the argument of the arctan series after halving and the number
+    of terms used by ``_arctan_kernel``."""
+    x = decimal.Decimal(6) / 7
+    while x.adjusted() >= -max(1, round(math.log10(prec))):
+        x = x / (1 + (1 + x * x).sqrt())
+    return x, prec // (-2 * (x.adjusted() + 1)) + 1
+
+
+def measure(func, *args):
+    timer = timeit.Timer(lambda: func(*args))
+    number, _ = timer.autorange()
+    return min(timer.repeat(3, number)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--precisions', type=int, nargs='+',
+                        default=[50, 500, 5000])
+    args = parser.parse_args()
+
+    print('{:>6} {:>6} {:>14} {:>14} {:>8}'.format(
+        'kernel', 'prec', 'decimal [us]', 'fixed [us]', 'speedup'))
+    for prec in args.precisions:
+        with decimal.localcontext() as ctx:
+            ctx.prec = prec
+            sin_args = sin_case(prec)
+            arctan_args = arctan_case(prec)
+            cases = [
+                ('sin', _sin_series_decimal, _sin_series_fixed, sin_args),
+                ('arctan', _arctan_series_decimal, _arctan_series_fixed,
+                 arctan_args),
+                ('e', e_decimal, dmath.compute_e_taylor, ()),
+            ]
+
+            for name, decimal_kernel, fixed_kernel, kernel_args in cases:
+                expected = decimal_kernel(*kernel_args)
+                result = fixed_kernel(*kernel_args)
+                if abs(result - expected) > abs(expected).scaleb(4 - prec):
+                    raise AssertionError(
+                        '{} differs at {} digits'.format(name, prec))
+
+                decimal_time = measure(decimal_kernel, *kernel_args)
+                fixed_time = measure(fixed_kernel, *kernel_args)
+                print('{:>6} {:>6} {:>14.1f} {:>14.1f} {:>7.1f}x'.format(
+                    name, prec, decimal_time * 1e6, fixed_time * 1e6,
+                    decimal_time / fixed_time))
+
+
+if __name__ == '__main__':
+    main()
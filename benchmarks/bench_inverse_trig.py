@@ -0,0 +1,136 @@
+#! /usr/bin/env python3
+"""
+Benchmark the inverse trigonometric functions of the ``decimal`` module for
+several precisions and arguments, comparing them with the former arctan
+series, which reduced the argument by a single halving only.
+
+Results of both variants are checked to agree.
+
+Usage: python benchmarks/bench_inverse_trig.py [--precisions N [N ...]]
+"""
+
+import argparse
+import decimal
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)  # run from a checkout without installing
+
+from littlecalc import dmath
+from littlecalc.modules.decimal import (
+    _arccos, _arccot, _arcsin, _arctan, adaptive_precision)
+
+
+def arctan_series_old(x):
+    """The former implementation of the arctan series."""
+    if abs(x) >= 0.9:  # improve convergence for |x| ~ 1
+        x = x / (1 + (1 + x**2).sqrt())
+        s = 2 * arctan_series_old(x)
+    else:
+        s = x
+        lasts = 0
+        num = x
+        sign = 1
+        k = 0
+
+        while s != lasts:
+            lasts = s
+            k += 1
+
+            sign *= -1
+            num *= x * x
+
+            s += sign * num / (2 * k + 1)
+
+    return +s
+
+
+@adaptive_precision
+def arctan_old(x):
+    return arctan_series_old(x)
+
+
+@adaptive_precision
+def arccot_old(x):
+    if not x:
+        return dmath.pi() / 2
+    elif x > 0:
+        return arctan_series_old(1 / x)
+    else:
+        return dmath.pi() + arctan_series_old(1 / x)
+
+
+@adaptive_precision
+def arcsin_old(x):
+    if abs(x) == 1:
+        return x * dmath.pi() / 2
+    return arctan_series_old(x / ((1 - x) * (1 + x)).sqrt())
+
+
+@adaptive_precision
+def arccos_old(x):
+    if x == -1:
+        return dmath.pi()
+    return 2 * arctan_series_old(((1 - x) / (1 + x)).sqrt())
+
+
+CASES = [
+    ('arctan', arctan_old, _arctan, '0.1'),
+    ('arctan', arctan_old, _arctan, '0.14285714285714285714'),
+    ('arctan', arctan_old, _arctan, '0.95'),
+    ('arctan', arctan_old, _arctan, '1e10'),
+    ('arccot', arccot_old, _arccot, '0.5'),
+    ('arcsin', arcsin_old, _arcsin, '0.7'),
+    ('arccos', arccos_old, _arccos, '0.3'),
+]
+
+
+def measure(func, x, min_time=0.2):
+    """Return ``(value, seconds)`` of calling ``func(x)``, where
+    ``seconds`` is the mean time of repeating it for at least
+    ``min_time`` seconds."""
+    count = 0
+    start = time.perf_counter()
+    while True:
+        value = func(x)
+        count += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return value, elapsed / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--precisions', type=int, nargs='+',
+                        default=[50, 500, 5000])
+    args = parser.parse_args()
+
+    print('{:>6} {:>6} {:>22} {:>12} {:>12} {:>8}'.format(
+        'func', 'prec', 'x', 'old [ms]', 'new [ms]', 'speedup'))
+    for prec in args.precisions:
+        with decimal.localcontext() as ctx:
+            ctx.prec = prec
+            dmath.pi()  # pi is cached, so do not measure its computation
+
+            for name, old, new, argument in CASES:
+                x = decimal.Decimal(argument)
+                old_value, old_time = measure(old, x)
+                new_value, new_time = measure(new, x)
+
+                with decimal.localcontext() as check:
+                    check.prec = prec - 2
+                    if +old_value != +new_value:
+                        raise AssertionError('{}({}) differs at {} '
+                                             'digits'.format(name, argument,
+                                                             prec))
+
+                print('{:>6} {:>6} {:>22} {:>12.3f} {:>12.3f} '
+                      '{:>7.1f}x'.format(
+                    name, prec, argument, old_time * 1e3, new_time * 1e3,
+                    old_time / new_time))
+
+
+if __name__ == '__main__':
+    main()
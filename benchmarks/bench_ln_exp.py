@@ -0,0 +1,87 @@
+#! /usr/bin/env python3
+"""
+Compare ``Decimal.ln`` and ``Decimal.exp`` with the AGM logarithm and the
+Newton exponential of ``littlecalc.dmath`` over a range of precisions.
+
+The cached constants pi and ln(2) used by the AGM are computed before the
+measurement. Results of both variants are checked to agree. The smallest
+measured precision from which on the new variant stays faster is reported
+as crossover, ``dmath.LN_AGM_THRESHOLD`` and ``dmath.EXP_NEWTON_THRESHOLD``
+should be set accordingly.
+
+Usage: python benchmarks/bench_ln_exp.py [--precisions N [N ...]]
+                                         [--arguments X [X ...]]
+"""
+
+import argparse
+import decimal
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)  # run from a checkout without installing
+
+from littlecalc import dmath
+
+
+FUNCTIONS = [
+    ('ln', decimal.Decimal.ln, dmath.ln_agm),
+    ('exp', decimal.Decimal.exp, dmath.exp_newton),
+]
+
+
+def measure(func, x):
+    timer = timeit.Timer(lambda: func(x))
+    number, _ = timer.autorange()
+    return min(timer.repeat(3, number)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--precisions', type=int, nargs='+',
+                        default=[50, 100, 150, 200, 300, 500, 1000, 2000,
+                                 5000])
+    parser.add_argument('--arguments', nargs='+',
+                        default=['0.7', '3.14159', '123.456'])
+    args = parser.parse_args()
+
+    print('{:>4} {:>6} {:>10} {:>14} {:>14} {:>8}'.format(
+        'func', 'prec', 'x', 'decimal [us]', 'dmath [us]', 'speedup'))
+    crossover = {}
+    for name, old, new in FUNCTIONS:
+        faster = None
+        for prec in args.precisions:
+            with decimal.localcontext() as ctx:
+                ctx.prec = prec
+                dmath.pi()
+                dmath.ln2()
+
+                old_total = new_total = 0
+                for argument in args.arguments:
+                    x = decimal.Decimal(argument)
+                    expected, result = old(x), new(x)
+                    if abs(result - expected) > abs(expected).scaleb(2 - prec):
+                        raise AssertionError('{}({}) differs at {} digits'
+                                             .format(name, argument, prec))
+
+                    old_time, new_time = measure(old, x), measure(new, x)
+                    old_total += old_time
+                    new_total += new_time
+                    print('{:>4} {:>6} {:>10} {:>14.1f} {:>14.1f} {:>7.1f}x'
+                          .format(name, prec, argument, old_time * 1e6,
+                                  new_time * 1e6, old_time / new_time))
+
+            if new_total >= old_total:
+                faster = None
+            elif faster is None:
+                faster = prec
+        crossover[name] = faster
+
+    for name, prec in crossover.items():
+        print('{} crossover: {}'.format(
+            name, 'not reached' if prec is None else '{} digits'.format(prec)))
+
+
+if __name__ == '__main__':
+    main()
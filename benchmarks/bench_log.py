@@ -0,0 +1,79 @@
+#! /usr/bin/env python3
+"""
+Benchmark a mixed workload of logarithms to the bases 2, e and 10 and a few
+other bases, comparing ``log`` of the ``decimal`` module (which caches the
+logarithms of its bases) with the former ``y.log10() / x.log10()``.
+
+Results of both variants are checked to agree.
+
+Usage: python benchmarks/bench_log.py [--precisions N [N ...]]
+                                      [--count N] [--seed N]
+"""
+
+import argparse
+import decimal
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)  # run from a checkout without installing
+
+from littlecalc import dmath
+from littlecalc.modules.decimal import _log, adaptive_precision
+
+
+@adaptive_precision
+def log_uncached(y, b):
+    """The former implementation of ``log``."""
+    return y.log10() / b.log10()
+
+
+def workload(rng, count):
+    """Return a list of ``(y, base)`` pairs of positive Decimals."""
+    bases = [decimal.Decimal(2), dmath.e(), decimal.Decimal(10),
+             decimal.Decimal(3), decimal.Decimal('1.5')]
+    pairs = []
+    for _ in range(count):
+        y = decimal.Decimal(rng.randrange(1, 10**6)).scaleb(
+            rng.randint(-8, 4))
+        pairs.append((y, rng.choice(bases)))
+    return pairs
+
+
+def measure(func, pairs):
+    start = time.perf_counter()
+    results = [func(y, b) for y, b in pairs]
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--precisions', type=int, nargs='+',
+                        default=[28, 500])
+    parser.add_argument('--count', type=int, default=2000,
+                        help='logarithms per precision')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print('{:>6} {:>7} {:>12} {:>12} {:>8}'.format(
+        'prec', 'count', 'old [ms]', 'new [ms]', 'speedup'))
+    for prec in args.precisions:
+        with decimal.localcontext() as ctx:
+            ctx.prec = prec
+            pairs = workload(random.Random(args.seed), args.count)
+
+            old_results, old_time = measure(log_uncached, pairs)
+            new_results, new_time = measure(_log, pairs)
+            if old_results != new_results:
+                raise AssertionError('results differ at {} digits'.format(
+                    prec))
+
+        print('{:>6} {:>7} {:>12.1f} {:>12.1f} {:>7.1f}x'.format(
+            prec, args.count, old_time * 1e3, new_time * 1e3,
+            old_time / new_time))
+
+
+if __name__ == '__main__':
+    main()
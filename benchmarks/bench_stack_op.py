@@ -0,0 +1,63 @@
+#! /usr/bin/env python3
+"""
+Measure the per-operation overhead of ``stack_op`` wrappers: the generic
+wrapper (``Stack.pop(count)`` and ``Stack.push(*values)``) against the
+specialized wrappers for one and two arguments.
+
+Usage: python benchmarks/bench_stack_op.py
+"""
+
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)  # run from a checkout without installing
+
+from littlecalc.core import (
+    Stack, _generic_stack_op, _unary_stack_op, _binary_stack_op)
+
+
+class _Calc:
+
+    def __init__(self):
+        self.stack = Stack([1] * 8)
+
+
+def unary(x):
+    return x
+
+
+def binary(x, y):
+    return x
+
+
+def main():
+    calc = _Calc()
+    number = 1000000
+
+    cases = [
+        ('unary', unary, 1, _unary_stack_op(unary, False)),
+        ('binary', binary, 2, _binary_stack_op(binary, False)),
+    ]
+    for name, func, arg_count, fast in cases:
+        generic = _generic_stack_op(func, arg_count, False)
+        if arg_count == 2:
+            # keep the stack size constant
+            refill = calc.stack.push1
+            before = timeit.timeit(
+                lambda: (generic(None, calc), refill(1)), number=number)
+            after = timeit.timeit(
+                lambda: (fast(None, calc), refill(1)), number=number)
+        else:
+            before = timeit.timeit(lambda: generic(None, calc),
+                                   number=number)
+            after = timeit.timeit(lambda: fast(None, calc), number=number)
+
+        print('{:8} generic {:6.0f} ns/op  specialized {:6.0f} ns/op  '
+              '({:.1f}x)'.format(name, before / number * 1e9,
+                                 after / number * 1e9, before / after))
+
+
+if __name__ == '__main__':
+    main()
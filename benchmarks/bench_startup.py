@@ -0,0 +1,126 @@
+#! /usr/bin/env python3
+"""
+Startup regression benchmark.
+
+Spawns ``python -m littlecalc --batch`` evaluating a single line and
+measures
+ * the total import time reported by ``-X importtime`` (sum of the self
+   times of all imported modules) and
+ * the wall-clock time from spawning the process until the first result
+   has been read.
+
+The median of several runs is compared with the baseline stored in
+``startup_baseline.json`` next to this script. The script exits with
+status 1 if a metric exceeds its baseline by more than the tolerance.
+
+Usage: python benchmarks/bench_startup.py [--runs N] [--tolerance F]
+                                          [--update]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+BASELINE = os.path.join(HERE, 'startup_baseline.json')
+
+FIRST_LINE = '1 2 +\n'
+
+ABSOLUTE_SLACK = {
+    'import_ms': 2.0,
+    'first_result_ms': 5.0,
+}
+"""Allowed regression in addition to the relative tolerance, as very small
+timings are noisy."""
+
+
+def _environment():
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        filter(None, [ROOT, env.get('PYTHONPATH')]))
+    return env
+
+
+def _command(*options):
+    return [sys.executable] + list(options) + ['-m', 'littlecalc', '--batch']
+
+
+def measure_import_time():
+    """Return the total import time in milliseconds."""
+    result = subprocess.run(
+        _command('-X', 'importtime'), input=FIRST_LINE, env=_environment(),
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True, check=True)
+
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_us = line.split(':', 1)[1].split('|')[0].strip()
+        if self_us.isdigit():
+            total_us += int(self_us)
+    return total_us / 1000
+
+
+def measure_first_result():
+    """Return the time until the first result was read in milliseconds."""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        _command(), env=_environment(), stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE, universal_newlines=True)
+    process.stdin.write(FIRST_LINE)
+    process.stdin.close()
+    result = process.stdout.readline()
+    elapsed = time.perf_counter() - start
+    process.stdout.close()
+    process.wait()
+
+    if result.strip() != '3':
+        raise RuntimeError('unexpected result {!r}'.format(result))
+    return elapsed * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed relative regression (default: 0.25)')
+    parser.add_argument('--update', action='store_true',
+                        help='store the measured values as new baseline')
+    args = parser.parse_args()
+
+    measurements = {
+        'import_ms': statistics.median(
+            measure_import_time() for _ in range(args.runs)),
+        'first_result_ms': statistics.median(
+            measure_first_result() for _ in range(args.runs)),
+    }
+
+    if args.update or not os.path.exists(BASELINE):
+        with open(BASELINE, 'w') as fd:
+            json.dump(measurements, fd, indent=4, sort_keys=True)
+            fd.write('\n')
+        print('baseline stored in {}'.format(BASELINE))
+
+    with open(BASELINE) as fd:
+        baseline = json.load(fd)
+
+    failed = False
+    for name, value in sorted(measurements.items()):
+        limit = baseline[name] * (1 + args.tolerance) + ABSOLUTE_SLACK[name]
+        status = 'ok' if value <= limit else 'REGRESSION'
+        failed = failed or value > limit
+        print('{:16} {:8.1f} ms  baseline {:8.1f} ms  limit {:8.1f} ms  '
+              '{}'.format(name, value, baseline[name], limit, status))
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,62 @@
+#! /usr/bin/env python3
+"""
+Benchmark sin and cos of the ``decimal`` module for several precisions and
+arguments of different magnitude. Each result is checked against the same
+function evaluated with twice the precision.
+
+Usage: python benchmarks/bench_trig.py [--precisions N [N ...]]
+                                       [--arguments X [X ...]]
+"""
+
+import argparse
+import decimal
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)  # run from a checkout without installing
+
+from littlecalc import dmath
+from littlecalc.modules.decimal import _cos, _sin
+
+
+FUNCTIONS = [('sin', _sin), ('cos', _cos)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--precisions', type=int, nargs='+',
+                        default=[28, 100, 1000])
+    parser.add_argument('--arguments', nargs='+',
+                        default=['0.1', '3', '1e6', '1e30'])
+    args = parser.parse_args()
+
+    print('{:>4} {:>6} {:>8} {:>12} {:>8}'.format(
+        'func', 'prec', 'x', 'time [us]', 'correct'))
+    for prec in args.precisions:
+        # pi is cached, so do not measure its computation
+        with decimal.localcontext() as ctx:
+            ctx.prec = 2 * prec + 100
+            dmath.pi()
+
+        for name, func in FUNCTIONS:
+            for argument in args.arguments:
+                x = decimal.Decimal(argument)
+                with decimal.localcontext() as ctx:
+                    ctx.prec = 2 * prec
+                    reference = func(x)
+
+                    ctx.prec = prec
+                    correct = func(x) == +reference
+                    timer = timeit.Timer(lambda: func(x))
+                    number, _ = timer.autorange()
+                    seconds = min(timer.repeat(3, number)) / number
+
+                print('{:>4} {:>6} {:>8} {:>12.1f} {:>8}'.format(
+                    name, prec, argument, seconds * 1e6,
+                    'yes' if correct else 'NO'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+# littlecalc
+# Copyright (C) 2017  Maximilian Timmerkamp
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Non-interactive evaluation of input lines, e.g. in shell pipelines.
+
+Every line is evaluated on the same ``Calculator`` (so storage and
+precision persist) and the X register is written as one output line.
+Lines are read lazily and the stack is cleared after each line (unless
+requested otherwise), so memory usage does not depend on input size.
+"""
+
+import sys
+import time
+
+from littlecalc.core import Calculator, NoSuchOperation
+
+
+ERROR_POLICIES = ('stop', 'skip', 'nan')
+"""What to do if evaluating a line fails: ``'stop'`` evaluation, ``'skip'``
+the line without writing a result or write ``'nan'`` as its result."""
+
+NAN = 'NaN'
+
+
+class BatchError(Exception):
+
+    def __init__(self, line_number, line):
+        super().__init__(
+            'error evaluating line {}: {!r}'.format(line_number, line))
+        self.line_number = line_number
+        self.line = line
+
+
+class BatchCalculator(Calculator):
+    """Calculator writing any output of operations to stderr and treating
+    unknown words as errors."""
+
+    def __init__(self, stderr=None):
+        super().__init__()
+        self.stderr = stderr
+
+    def output(self, text):
+        print(text, file=self.stderr or sys.stderr)
+
+    def unknown_word(self, word):
+        raise NoSuchOperation(word)
+
+
+class BatchStats:
+
+    def __init__(self):
+        self.lines = 0
+        self.errors = 0
+        self.start = time.perf_counter()
+        self.end = None
+
+    def stop(self):
+        self.end = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        return (self.end or time.perf_counter()) - self.start
+
+    def __str__(self):
+        elapsed = self.elapsed
+        rate = self.lines / elapsed if elapsed > 0 else float('inf')
+        return '{} lines, {} errors in {:.3f} s ({:.0f} lines/s)'.format(
+            self.lines, self.errors, elapsed, rate)
+
+
+def evaluate_lines(calc, lines, on_error='stop', keep_stack=False,
+                   stats=None):
+    """
+    Evaluate ``lines`` lazily and yield the X register after every line as
+    a string (an empty string if the stack is empty).
+
+    ``on_error`` is one of ``ERROR_POLICIES``. With ``'stop'`` a
+    ``BatchError`` is raised (chained to the original error). If
+    ``keep_stack`` is False, the stack is cleared after each line.
+    ``stats`` is an optional ``BatchStats`` object to be updated.
+    """
+    if on_error not in ERROR_POLICIES:
+        raise ValueError('unknown error policy {!r}'.format(on_error))
+
+    stack = calc.stack
+    for line_number, line in enumerate(lines, start=1):
+        if stats is not None:
+            stats.lines += 1
+
+        try:
+            calc.parse_input(line)
+        except Exception as err:
+            if stats is not None:
+                stats.errors += 1
+            if not keep_stack:
+                stack.clear()
+
+            if on_error == 'stop':
+                raise BatchError(line_number, line.rstrip('\n')) from err
+            elif on_error == 'nan':
+                yield NAN
+            continue
+
+        result = str(stack.peek()) if len(stack) > 0 else ''
+        if not keep_stack:
+            stack.clear()
+        yield result
+
+
+def run_batch(calc, infile, outfile, on_error='stop', keep_stack=False,
+              stats=None):
+    """
+    Evaluate every line of ``infile`` and write one result per line to
+    ``outfile``. See ``evaluate_lines`` for the other parameters.
+    """
+    write = outfile.write
+    for result in evaluate_lines(calc, infile, on_error, keep_stack, stats):
+        write(result)
+        write('\n')
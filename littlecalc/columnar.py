@@ -0,0 +1,463 @@
+#! /usr/bin/env python3
+# littlecalc
+# Copyright (C) 2017  Maximilian Timmerkamp
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Evaluate one expression over many rows of input at once.
+
+The expression is compiled once (see ``Calculator.compile``). Afterwards
+every operation having a ``'stack'`` method is replaced by a kernel that
+applies it to whole columns of values. All other operations (``sto``,
+``rcl``, ``xchy``, ...) only move values around, so they work on columns
+unchanged. This way interpreting and dispatching the expression is done
+once per expression instead of once per row.
+
+Two backends are supported:
+ * ``'decimal'``: The operations' ``'stack'`` methods are applied to
+   lists of Decimals.
+ * ``'float'``: The functions in ``FLOAT_KERNELS`` (looked up by operation
+   name) are applied to columns of floats. If NumPy is installed, columns
+   are NumPy arrays and each kernel is a single vectorized call. Otherwise
+   columns are ``array.array('d')`` objects.
+
+The float backend never raises for invalid arguments, with or without
+NumPy. Like IEEE 754 arithmetic (and NumPy with all warnings ignored) it
+returns NaN outside of an operation's domain (e.g. ``-1 sqrt``, ``-8 3 inv
+pow``), signed infinity at poles (e.g. ``0 inv``, ``0 ln``, ``1 arctanh``)
+and on overflow (e.g. ``1000 exp``). Results are always real floats. The
+decimal backend raises like the operations it applies.
+
+Operations taking a numeric argument from the input stream (see
+``STREAM_OPERATIONS``) are replaced by pushing the captured argument and
+an equivalent operation taking it from the stack.
+"""
+
+import argparse
+import array
+import csv
+import itertools
+import math
+import sys
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from littlecalc.core import CalculatorError, Program, Stack
+
+
+BACKENDS = ('decimal', 'float')
+
+
+def _is_odd(x):
+    return x % 2 == 1  # False for non-integers, NaN and infinity
+
+
+def _div(x, y):
+    try:
+        return y / x
+    except ZeroDivisionError:
+        if y == 0 or math.isnan(y):
+            return math.nan
+        return math.copysign(math.inf, y) * math.copysign(1.0, x)
+
+
+def _pow(x, y):
+    try:
+        return math.pow(y, x)
+    except OverflowError:
+        pass
+    except ValueError:  # negative base or zero to a negative power
+        if y != 0:
+            return math.nan
+    return math.copysign(math.inf, y) if _is_odd(x) else math.inf
+
+
+def _log(func):
+    def log(x):
+        if x > 0 or math.isnan(x):
+            return func(x)
+        return -math.inf if x == 0 else math.nan
+    return log
+
+
+def _nan_outside_domain(func):
+    def kernel(x):
+        try:
+            return func(x)
+        except ValueError:
+            return math.nan
+    return kernel
+
+
+def _inf_on_overflow(func):
+    def kernel(x):
+        try:
+            return func(x)
+        except OverflowError:
+            return math.copysign(math.inf, func(math.copysign(1.0, x)))
+    return kernel
+
+
+def _rounding(func):
+    def kernel(x):
+        return float(func(x)) if math.isfinite(x) else x
+    return kernel
+
+
+def _extremum(func):
+    def kernel(x, y):
+        return math.nan if math.isnan(x) or math.isnan(y) else func(x, y)
+    return kernel
+
+
+def _arctanh(x):
+    if abs(x) == 1:
+        return math.copysign(math.inf, x)
+    return math.atanh(x) if abs(x) < 1 else math.nan
+
+
+_ln = _log(math.log)
+_sin = _nan_outside_domain(math.sin)
+_cos = _nan_outside_domain(math.cos)
+_tan = _nan_outside_domain(math.tan)
+_sinh = _inf_on_overflow(math.sinh)
+_cosh = _inf_on_overflow(math.cosh)
+
+
+FLOAT_KERNELS = {
+    'add': lambda x, y: y + x,
+    'sub': lambda x, y: y - x,
+    'mul': lambda x, y: y * x,
+    'div': _div,
+    'inv': lambda x: _div(x, 1.0),
+    'sqrt': lambda x: math.sqrt(x) if not x < 0 else math.nan,
+    'sqr': lambda x: x * x,
+    'exp': _inf_on_overflow(math.exp),
+    'ln': _ln,
+    'log10': _log(math.log10),
+    'log2': _log(math.log2),
+    'pow': _pow,
+    'root': lambda x, y: _pow(_div(x, 1.0), y),
+    'log': lambda x, y: _div(_ln(x), _ln(y)),
+    'abs': abs,
+    'floor': _rounding(math.floor),
+    'ceil': _rounding(math.ceil),
+    'min': _extremum(min),
+    'max': _extremum(max),
+    'sin': _sin,
+    'cos': _cos,
+    'sincos': lambda x: (_sin(x), _cos(x)),
+    'tan': _tan,
+    'cot': lambda x: _div(_tan(x), 1.0),
+    'arctan': math.atan,
+    'arccot': lambda x: math.pi / 2 - math.atan(x),
+    'arcsin': _nan_outside_domain(math.asin),
+    'arccos': _nan_outside_domain(math.acos),
+    'sinh': _sinh,
+    'cosh': _cosh,
+    'sinhcosh': lambda x: (_sinh(x), _cosh(x)),
+    'tanh': math.tanh,
+    'coth': lambda x: _div(math.tanh(x), 1.0),
+    'arcsinh': math.asinh,
+    'arccosh': _nan_outside_domain(math.acosh),
+    'arctanh': _arctanh,
+    'arccoth': lambda x: _arctanh(_div(x, 1.0)),
+}
+"""Mapping operation names to functions on floats. They are called with the
+same arguments as the operation's ``'stack'`` method and return NaN or
+infinity instead of raising (see the module's docstring)."""
+
+STREAM_OPERATIONS = {
+    'logb': 'log',  # 8 logb 2 == 8 2 log
+}
+"""Mapping names of operations taking their last argument from the input
+stream to the names of operations taking it from the top of the stack."""
+
+
+def _numpy_kernels(np):
+    """Return a dict of kernels operating on whole NumPy arrays (or NumPy
+    scalars, see ``_numpy_kernel``). Kernels only using arithmetic
+    operators are shared with ``FLOAT_KERNELS``."""
+    kernels = {name: FLOAT_KERNELS[name] for name in (
+        'add', 'sub', 'mul', 'sqr')}
+    kernels.update({
+        'div': lambda x, y: y / x,
+        'inv': lambda x: 1 / x,
+        'pow': lambda x, y: y ** x,
+        'root': lambda x, y: y ** (1 / x),
+        'sqrt': np.sqrt,
+        'exp': np.exp,
+        'ln': np.log,
+        'log10': np.log10,
+        'log2': np.log2,
+        'log': lambda x, y: np.log(y) / np.log(x),
+        'abs': np.abs,
+        'floor': np.floor,
+        'ceil': np.ceil,
+        'min': np.minimum,
+        'max': np.maximum,
+        'sin': np.sin,
+        'cos': np.cos,
+        'sincos': lambda x: (np.sin(x), np.cos(x)),
+        'tan': np.tan,
+        'cot': lambda x: 1 / np.tan(x),
+        'arctan': np.arctan,
+        'arccot': lambda x: np.pi / 2 - np.arctan(x),
+        'arcsin': np.arcsin,
+        'arccos': np.arccos,
+        'sinh': np.sinh,
+        'cosh': np.cosh,
+        'sinhcosh': lambda x: (np.sinh(x), np.cosh(x)),
+        'tanh': np.tanh,
+        'coth': lambda x: 1 / np.tanh(x),
+        'arcsinh': np.arcsinh,
+        'arccosh': np.arccosh,
+        'arctanh': np.arctanh,
+        'arccoth': lambda x: np.arctanh(1 / x),
+    })
+    return kernels
+
+
+if numpy is not None:
+    NUMPY_KERNELS = _numpy_kernels(numpy)
+    _COLUMN_TYPES = (list, array.array, numpy.ndarray)
+else:
+    NUMPY_KERNELS = None
+    _COLUMN_TYPES = (list, array.array)
+
+
+def _is_column(value):
+    return isinstance(value, _COLUMN_TYPES)
+
+
+def _push_result(calc, result, is_column, push_multiple):
+    if not push_multiple:
+        calc.stack.push(result)
+    elif is_column:
+        calc.stack.push(*(list(column) for column in zip(*result)))
+    else:
+        calc.stack.push(*result)
+
+
+def _map_kernel(func, arg_count, push_multiple, size, make_column,
+                convert=None):
+    """Return a 'calc' method applying ``func`` row by row. Scalar arguments
+    are converted by ``convert`` (if not None) and broadcast,
+    ``make_column`` converts the mapped iterator into a column."""
+    def kernel(module, calc):
+        args = calc.stack.pop(arg_count)
+        if convert is not None:
+            args = [arg if _is_column(arg) else convert(arg) for arg in args]
+
+        if any(_is_column(arg) for arg in args):
+            rows = [arg if _is_column(arg) else itertools.repeat(arg, size)
+                    for arg in args]
+            if push_multiple:
+                result = list(map(func, *rows))
+            else:
+                result = make_column(map(func, *rows))
+            _push_result(calc, result, True, push_multiple)
+        else:
+            _push_result(calc, func(*args), False, push_multiple)
+    return kernel
+
+
+def _float_map_kernel(func, arg_count, push_multiple, size):
+    return _map_kernel(func, arg_count, push_multiple, size,
+                       lambda values: array.array('d', values), float)
+
+
+def _numpy_kernel(func, arg_count, push_multiple):
+    """Return a 'calc' method calling ``func`` once on whole arrays. Scalar
+    arguments are converted to NumPy floats, so they follow NumPy's rules
+    for invalid arguments, too."""
+    def kernel(module, calc):
+        args = [arg if _is_column(arg) else numpy.float64(float(arg))
+                for arg in calc.stack.pop(arg_count)]
+        with numpy.errstate(all='ignore'):
+            result = func(*args)
+        _push_result(calc, result, False, push_multiple)
+    return kernel
+
+
+def vectorize(calc, program, size, backend='decimal'):
+    """
+    Return a new ``Program`` which executes ``program`` on columns of
+    ``size`` rows using the given backend. A ``CalculatorError`` is raised
+    for operations that have no kernel in the float backend.
+
+    Resolving operations may load lazily registered modules, so the new
+    program belongs to the calculator's generation after vectorizing (see
+    ``Calculator.run``).
+    """
+    if backend not in BACKENDS:
+        raise ValueError('unknown backend {!r}'.format(backend))
+
+    steps = []
+    operations = []
+    for step, operation in zip(program.steps, program.operations):
+        func, module, stream = step
+        if operation is not None and operation.name in STREAM_OPERATIONS:
+            if not stream:
+                raise CalculatorError('argument missing for {!r}'.format(
+                    operation.name))
+            for word in stream:
+                steps.append((None, calc.to_numeric(word), None))
+                operations.append(None)
+            module, operation, func = calc._resolve(
+                STREAM_OPERATIONS[operation.name])
+            step = (func, module, None)
+
+        operations.append(operation)
+        if operation is None or 'stack' not in operation.methods:
+            steps.append(step)
+            continue
+
+        arg_count = operation.arg_count
+        push_multiple = operation.push_multiple
+
+        if backend == 'decimal':
+            kernel = _map_kernel(
+                operation.methods['stack'], arg_count, push_multiple, size,
+                list)
+        else:
+            kernels = NUMPY_KERNELS or FLOAT_KERNELS
+            if operation.name not in kernels:
+                raise CalculatorError(
+                    'operation {!r} is not supported by the float '
+                    'backend'.format(operation.name))
+
+            if NUMPY_KERNELS is not None:
+                kernel = _numpy_kernel(
+                    kernels[operation.name], arg_count, push_multiple)
+            else:
+                kernel = _float_map_kernel(
+                    kernels[operation.name], arg_count, push_multiple, size)
+        steps.append((kernel, module, stream))
+
+    return Program(program.source, steps, operations, calc.generation)
+
+
+def _make_column(calc, values, backend):
+    if backend == 'decimal':
+        return list(map(calc.to_numeric, values))
+    elif numpy is not None:
+        return numpy.asarray(values, dtype=float)
+    else:
+        return array.array('d', map(float, values))
+
+
+def _broadcast(value, size, backend):
+    if backend == 'decimal':
+        return [value] * size
+    elif numpy is not None:
+        return numpy.full(size, float(value))
+    else:
+        return array.array('d', [float(value)]) * size
+
+
+def evaluate_columns(calc, expression, columns, backend='decimal'):
+    """
+    Evaluate ``expression`` once for every row of ``columns`` and return
+    the topmost stack value of each evaluation as a column.
+
+    ``columns`` maps register names to equally long sequences of values
+    (numbers or numeric strings). Within ``expression`` the values of the
+    current row are available using ``rcl NAME``. The stack of ``calc`` is
+    not used and its storage is left unchanged.
+
+    Results are returned as a list for the ``'decimal'`` backend. The
+    ``'float'`` backend returns a NumPy array if NumPy is installed or an
+    ``array.array('d')`` otherwise.
+    """
+    sizes = {len(values) for values in columns.values()}
+    if len(sizes) > 1:
+        raise ValueError('all columns must have the same length')
+    size = sizes.pop() if sizes else 1
+
+    # Converting values may load lazily registered numeric types, so do it
+    # before compiling to keep the program up to date.
+    registers = {name: _make_column(calc, values, backend)
+                 for name, values in columns.items()}
+    program = vectorize(calc, calc.compile(expression), size, backend)
+
+    stack, storage = calc.stack, calc.storage
+    calc.stack = Stack()
+    calc.storage = dict(storage)
+    calc.storage.update(registers)
+
+    try:
+        calc.run(program)
+        if len(calc.stack) == 0:
+            raise CalculatorError('expression left no result on the stack')
+        result = calc.stack.pop()
+    finally:
+        calc.stack, calc.storage = stack, storage
+
+    if not _is_column(result):
+        result = _broadcast(result, size, backend)
+    elif backend == 'decimal':
+        result = list(result)
+    return result
+
+
+def main(argv=None):
+    from littlecalc.tui import TUICalculator, load_default_modules
+
+    parser = argparse.ArgumentParser(
+        description='Evaluate an RPN expression for every row of a CSV '
+                    'file. The columns are available as registers named '
+                    'after the header row.')
+    parser.add_argument('expression', help='RPN expression, e.g. '
+                                           '"rcl a rcl b *"')
+    parser.add_argument('file', nargs='?', type=argparse.FileType('r'),
+                        default=sys.stdin, help='CSV file (default: stdin)')
+    parser.add_argument('--backend', choices=BACKENDS, default='decimal')
+    parser.add_argument('--prec', type=int, default=None,
+                        help='decimal precision')
+    parser.add_argument('--delimiter', default=',')
+    args = parser.parse_args(argv)
+
+    calc = TUICalculator()
+    load_default_modules(calc)
+    if args.prec is not None:
+        calc.parse_input('prec {}'.format(args.prec))
+
+    reader = csv.reader(args.file, delimiter=args.delimiter)
+    header = next(reader)
+    rows = list(reader)
+    columns = {name: [row[i] for row in rows]
+               for i, name in enumerate(header)}
+
+    try:
+        results = evaluate_columns(calc, args.expression, columns,
+                                   args.backend)
+    except CalculatorError as err:
+        print('An error occurred: {}'.format(err), file=sys.stderr)
+        return 1
+    except (ArithmeticError, ValueError) as err:
+        # e.g. decimal.InvalidOperation raised by the decimal backend
+        print('An error occurred: {!r}'.format(err), file=sys.stderr)
+        return 1
+
+    sys.stdout.writelines('{}\n'.format(value) for value in results)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
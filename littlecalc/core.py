@@ -35,8 +35,11 @@ import abc
 import functools
 import importlib
 import importlib.util
-import traceback
-from collections import deque
+import sys
+import time
+from collections import OrderedDict, deque
+
+from littlecalc import tracing
 
 
 class CalculatorError(Exception):
@@ -63,6 +66,21 @@ class ModuleLoadError(CalculatorError):
     pass
 
 
+class _NotNumericType:
+    """Type of the ``NOT_NUMERIC`` sentinel."""
+
+    def __repr__(self):
+        return 'NOT_NUMERIC'
+
+    def __bool__(self):
+        return False
+
+
+NOT_NUMERIC = _NotNumericType()
+"""Returned by ``NumericConverter.try_parse`` for words which are not
+numeric."""
+
+
 class NumericConverter(metaclass=abc.ABCMeta):
 
     @classmethod
@@ -75,6 +93,17 @@ class NumericConverter(metaclass=abc.ABCMeta):
     def to_numeric(cls, word: str) -> object:
         return None
 
+    @classmethod
+    def try_parse(cls, word: str) -> object:
+        """Classify and convert ``word`` in one step. Returns the numeric
+        value of ``word`` or ``NOT_NUMERIC`` if it is not numeric.
+
+        The default implementation calls ``is_numeric`` and ``to_numeric``,
+        converters should override it to parse each word only once."""
+        if cls.is_numeric(word):
+            return cls.to_numeric(word)
+        return NOT_NUMERIC
+
 
 def stack_op(func=None, arg_count=None, push_multiple=False):
     """Create a decorator for a simple arithmetic function with one result,
@@ -99,22 +128,22 @@ def stack_op(func=None, arg_count=None, push_multiple=False):
             x, y = calc.stack.pop(2)
             result = y + x
             calc.stack.push(result)
+
+    For ``arg_count`` 1 and 2 specialized wrappers are used, which work
+    directly on the stack's deque instead of building intermediate lists
+    and tuples (see ``Stack.pop1`` and ``Stack.pop2``).
     """
     if arg_count is None:
         raise ValueError('arg_count must bot be None')
 
     def decorating_function(func):
-        @functools.wraps(func)
-        def wrapper(module, calc):
-            values = calc.stack.pop(arg_count)
-
-            result = func(*values)
-
-            if push_multiple:
-                calc.stack.push(*result)
-            else:
-                calc.stack.push(result)
-        return wrapper
+        if arg_count == 1:
+            wrapper = _unary_stack_op(func, push_multiple)
+        elif arg_count == 2:
+            wrapper = _binary_stack_op(func, push_multiple)
+        else:
+            wrapper = _generic_stack_op(func, arg_count, push_multiple)
+        return functools.wraps(func)(wrapper)
 
     if func is not None:
         return decorating_function(func)
@@ -122,6 +151,57 @@ def stack_op(func=None, arg_count=None, push_multiple=False):
         return decorating_function
 
 
+def _generic_stack_op(func, arg_count, push_multiple):
+    def wrapper(module, calc):
+        values = calc.stack.pop(arg_count)
+
+        result = func(*values)
+
+        if push_multiple:
+            calc.stack.push(*result)
+        else:
+            calc.stack.push(result)
+    return wrapper
+
+
+def _unary_stack_op(func, push_multiple):
+    if push_multiple:
+        def wrapper(module, calc):
+            stack = calc.stack
+            values = stack.stack
+            x = values.pop()
+            stack.lastx = x
+            values.extend(func(x))
+    else:
+        def wrapper(module, calc):
+            stack = calc.stack
+            values = stack.stack
+            x = values.pop()
+            stack.lastx = x
+            values.append(func(x))
+    return wrapper
+
+
+def _binary_stack_op(func, push_multiple):
+    if push_multiple:
+        def wrapper(module, calc):
+            stack = calc.stack
+            values = stack.stack
+            x = values.pop()
+            stack.lastx = x
+            y = values.pop()
+            values.extend(func(x, y))
+    else:
+        def wrapper(module, calc):
+            stack = calc.stack
+            values = stack.stack
+            x = values.pop()
+            stack.lastx = x
+            y = values.pop()
+            values.append(func(x, y))
+    return wrapper
+
+
 class Operation:
     """
     An Operation stores multiple methods which all do the same operation
@@ -134,6 +214,20 @@ class Operation:
 
     ``aliases`` is a list of aliases for this operation.
 
+    ``stream_args`` is the number of words the ``'calc'`` method pulls from
+    ``calc.input_stream`` (e.g. 1 for ``sto a``). These words are captured
+    when a line is compiled by ``Calculator.compile``. If the number depends
+    on the words themselves (e.g. ``stats`` only pulls ``on``, ``off`` or
+    ``reset``), ``stream_args`` is a function called with the list of words
+    following the operation, returning how many of them are pulled.
+
+    ``pure`` marks operations whose ``'stack'`` method is a function of its
+    arguments and the calculator's context only (see
+    ``Calculator.register_context_key``), e.g. ``sin``. Results of pure
+    operations called from the prompt are cached (see ``ResultCache``).
+    Operations accessing storage, the input stream or modules (e.g.
+    ``sto``, ``prec`` or ``loadmod``) must not be marked pure.
+
     ``default`` is the method type used if this operation is called
     (``'plain'`` by default). E.g.::
 
@@ -262,13 +356,20 @@ class Operation:
 
     """
 
-    def __init__(self, name, aliases=None, doc=None, default='plain'):
+    def __init__(self, name, aliases=None, doc=None, default='plain',
+                 stream_args=0, pure=False):
         self.name = name
         self.aliases = aliases
         self.doc = doc
         self.default = default
+        self.stream_args = stream_args
+        self.pure = pure
         self.methods = {}
 
+        # set by add_stack
+        self.arg_count = None
+        self.push_multiple = False
+
     def __call__(self, *args, **kwargs):
         """Call default method type (specified by ``self.default``)."""
         if self.default in self.methods:
@@ -290,6 +391,10 @@ class Operation:
         return self.name == name or (
             self.aliases is not None and name in self.aliases)
 
+    def names(self):
+        """Returns a list of this operation's name followed by its aliases."""
+        return [self.name] + list(self.aliases or ())
+
     def get_callable(self, type, calc=None, module=None):
         """
         Returns a callable for the requested method ``type``. ``calc`` and
@@ -302,7 +407,7 @@ class Operation:
             raise Exception('unsupported type {!r} for Operation {!r}'.format(
                 type, self.name))
 
-        if type in ('plain', 'calc'):
+        if type in ('plain', 'calc', 'stack'):
             return func
         elif type == 'remote':
             wrapper = func
@@ -372,40 +477,39 @@ class Operation:
         A remote method can be called with any number of parameters.
 
         Internally a function is stored in ``self.methods['remote']`` that
-        requires ``module`` and ``calc`` to be passed. It stores both in its
-        local namespace and returns a function that wraps the passed function
-        ``func``. When this wrapper is called, it invokes ``func`` with
-        parameters ``module``, ``calc`` and any arguments the wrapper was
-        called with. (Whether ``module`` and ``calc`` are passed depends on
-        ``pass_module`` and ``pass_calc``.)
+        requires ``module`` and ``calc`` to be passed. It binds both to
+        ``func`` and returns the bound callable. When it is called, it
+        invokes ``func`` with parameters ``module``, ``calc`` and any
+        arguments it was called with. (Whether ``module`` and ``calc`` are
+        passed depends on ``pass_module`` and ``pass_calc``, this is
+        resolved once when binding.) ``Calculator.get_callable`` and
+        ``Module.get_callable`` cache the bound callables.
         """
         if from_type == 'remote':
             raise ValueError('from_type="remote" is not allowed')
 
-        def context_storing_func(module, calc):
-            if func is None:
+        def binding_func(module, calc):
+            base_func = func
+            if base_func is None:
                 base_func = self.methods.get(from_type, None)
                 if base_func is None:
-                    raise Exception()  # TODO
-
-            @functools.wraps(base_func)
-            def wrapping_func(*args, **kwargs):
-                """
-                This wrapper is used to delay execution of ``base_func`` and
-                call it with requested parameters ``module`` and ``calc``.
-                """
-                if pass_module and pass_calc:
-                    return base_func(module, calc, *args, **kwargs)
-                elif pass_module:
-                    return base_func(module, *args, **kwargs)
-                elif pass_calc:
-                    return base_func(calc, *args, **kwargs)
-                else:
-                    return base_func(*args, **kwargs)
-
-            return wrapping_func
-
-        self.methods['remote'] = context_storing_func
+                    raise Exception(
+                        'Operation {!r} has no {!r} method to call '
+                        'remotely'.format(self.name, from_type))
+
+            if pass_module and pass_calc:
+                bound_args = (module, calc)
+            elif pass_module:
+                bound_args = (module,)
+            elif pass_calc:
+                bound_args = (calc,)
+            else:
+                return base_func
+
+            bound_func = functools.partial(base_func, *bound_args)
+            return functools.update_wrapper(bound_func, base_func)
+
+        self.methods['remote'] = binding_func
         return self
 
     def add_stack(self, func=None, add_plain=False, **kwargs):
@@ -422,11 +526,19 @@ class Operation:
         If ``func`` is None, a decorator is returned.
 
         If ``add_plain`` is True, a ``'plain'`` method is added as well.
+
+        The passed function itself is stored as ``'stack'`` method and its
+        ``arg_count`` and ``push_multiple`` settings are stored as attributes
+        of this operation, so it can be applied to other kinds of stacks
+        (see ``littlecalc.columnar``).
         """
         def decorating_function(func):
             if add_plain:
                 self.add_plain(func)
             self.add_calc(stack_op(func, **kwargs))
+            self.methods['stack'] = func
+            self.arg_count = kwargs.get('arg_count', None)
+            self.push_multiple = kwargs.get('push_multiple', False)
             return self
 
         if func is not None:
@@ -473,13 +585,16 @@ class Operation:
             self.name, self.aliases, list(self.methods.keys()))
 
 
-def operation(name, func=None, aliases=None, doc=None, type='plain', **kwargs):
+def operation(name, func=None, aliases=None, doc=None, type='plain',
+              stream_args=0, pure=False, **kwargs):
     """
     Returns a new Operation with specified name and aliases. ``func`` is added
     to this operation using the given ``type``. And other keyword arguments
     are passed to ``Operation.add``. If ``func`` is None, a decorator is
     returned.
 
+    ``stream_args`` and ``pure`` are passed to ``Operation``.
+
     ``doc`` is stored in ``operation.doc`` if not None, otherwise the
     function's docstring is used as documentation for the operation.
 
@@ -502,7 +617,8 @@ def operation(name, func=None, aliases=None, doc=None, type='plain', **kwargs):
 
     def decorating_func(func):
         documentation = doc or func.__doc__
-        operation = Operation(name, aliases=aliases, doc=documentation)
+        operation = Operation(name, aliases=aliases, doc=documentation,
+                              stream_args=stream_args, pure=pure)
         return operation.add(type, func, **kwargs)
 
     if func is not None:
@@ -515,6 +631,10 @@ class ModuleMeta(type):
     """
     Metaclass for modules. Searches the classes namespace for Operations and
     places a dict of attribute_name: operation into class._operations.
+
+    Additionally a dict mapping every operation name and alias to its
+    operation is placed into class._operation_names. An ``AliasingError``
+    is raised if two operations of a module share a name or an alias.
     """
 
     def __new__(cls, name, bases, namespace, **kwargs):
@@ -531,6 +651,17 @@ class ModuleMeta(type):
                 operations[attr] = namespace[attr]
         result._operations = operations
 
+        operation_names = {}
+        for operation in operations.values():
+            for op_name in operation.names():
+                other = operation_names.setdefault(op_name, operation)
+                if other is not operation:
+                    raise AliasingError(
+                        'operations {!r} and {!r} of {} share the name '
+                        '{!r}'.format(other.name, operation.name, name,
+                                      op_name))
+        result._operation_names = operation_names
+
         return result
 
 
@@ -540,24 +671,35 @@ class Module(metaclass=ModuleMeta):
         self.name = name
         self.calc = None
 
+        self._callables = {}
+        """Cache of callables returned by ``get_callable``."""
+
     def load_module(self, calc):
         if self.calc is not None and self.calc is not calc:
             raise ValueError('Module is already loaded by another calculator!')
         self.calc = calc
+        self._callables.clear()
 
     def unload_module(self):
         self.calc = None
+        self._callables.clear()
 
     def _get_operation(self, name):
-        for operation in self._operations.values():
-            if operation.has_name(name):
-                return operation
-        raise NoSuchOperation('operation {!r} not found'.format(name))
+        try:
+            return self._operation_names[name]
+        except KeyError:
+            raise NoSuchOperation(name) from None
 
     def get_callable(self, name, type='remote'):
+        try:
+            return self._callables[name, type]
+        except KeyError:
+            pass
+
         operation = self._get_operation(name)
 
         func = operation.get_callable(type, module=self, calc=self.calc)
+        self._callables[name, type] = func
         return func
 
     def do_operation(self, name):
@@ -567,12 +709,7 @@ class Module(metaclass=ModuleMeta):
     def is_executable(self, operation):
         """Returns whether the passed operation is executable by
         this module."""
-        try:
-            self._get_operation(operation)
-        except NoSuchOperation:
-            return False
-        else:
-            return True
+        return operation in self._operation_names
 
 
 class Stack:
@@ -595,6 +732,18 @@ class Stack:
         else:
             raise ValueError('int or None required')
 
+    def pop1(self):
+        """Fast path of ``pop()``: return and remove the topmost value."""
+        self.lastx = x = self.stack.pop()
+        return x
+
+    def pop2(self):
+        """Fast path of ``pop(2)``: return a tuple of the two topmost values,
+        the topmost first."""
+        stack = self.stack
+        self.lastx = x = stack.pop()
+        return x, stack.pop()
+
     def peek(self):
         """
         Return the topmost value from stack without removing it.
@@ -609,6 +758,10 @@ class Stack:
         for value in values:
             self.stack.append(value)
 
+    def push1(self, value):
+        """Fast path of ``push()`` for a single value."""
+        self.stack.append(value)
+
     def clear(self):
         self.stack.clear()
 
@@ -643,9 +796,233 @@ class ConsumingInputStream:
         while True:
             try:
                 value = self.pop()
-                yield value
             except IndexError:
-                raise StopIteration
+                return
+            yield value
+
+
+class Program:
+    """
+    A line of input compiled by ``Calculator.compile`` and executed by
+    ``Calculator.run``.
+
+    ``steps`` is a list of ``(func, arg, stream)`` tuples. If ``func`` is
+    None, ``arg`` is a numeric value pushed onto the stack. Otherwise ``func``
+    is a ``'calc'`` method called as ``func(arg, calc)`` where ``arg`` is the
+    module of the operation. ``stream`` is None or a tuple of words captured
+    for the operation's ``calc.input_stream``.
+
+    ``operations`` is a list parallel to ``steps`` containing the
+    ``Operation`` of each step or None for numeric values.
+
+    ``generation`` is the value of ``Calculator.generation`` at compile time.
+    ``Calculator.run`` recompiles programs whose generation is outdated.
+    """
+
+    def __init__(self, source, steps, operations, generation):
+        self.source = source
+        self.steps = steps
+        self.operations = operations
+        self.generation = generation
+
+    def __len__(self):
+        return len(self.steps)
+
+    def __repr__(self):
+        return '<Program: {!r}>'.format(self.source)
+
+
+MANIFEST_SUFFIX = '.manifest'
+"""Suffix of the manifest file read by ``read_manifest``, which replaces
+the suffix of the module's source file."""
+
+
+def read_manifest(spec):
+    """
+    Return the manifest of the Python module described by the module spec
+    ``spec`` or None, if it does not ship one. The module is not imported,
+    instead the file next to its source with suffix ``MANIFEST_SUFFIX`` is
+    read (e.g. ``decimal.manifest`` for ``decimal.py``)::
+
+        # comment
+        operations: add + sub -
+        operations: mul *
+        numeric_types: DecimalConverter
+
+    Every line names a key and a list of whitespace separated values,
+    repeated keys extend the list. ``'operations'`` lists all operation
+    names and aliases provided by the module's ``get_modules`` function.
+    ``'numeric_types'`` lists the numeric types registered by it (if any).
+    Modules should also declare the manifest as ``__manifest__`` dict in
+    their source, the tests check that both agree.
+    """
+    origin = getattr(spec, 'origin', None)
+    if not isinstance(origin, str) or not origin.endswith('.py'):
+        return None
+
+    try:
+        with open(origin[:-3] + MANIFEST_SUFFIX, 'r',
+                  encoding='utf-8') as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+
+    manifest = {}
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        key, sep, values = line.partition(':')
+        if not sep:
+            return None  # malformed, load the module eagerly
+        manifest.setdefault(key.strip(), []).extend(values.split())
+    return manifest
+
+
+class _Activation:
+    """Context manager returned by ``Calculator.activated``."""
+
+    def __init__(self, calc):
+        self.calc = calc
+        self.entered = []  # list of (exit, token)
+
+    def __enter__(self):
+        calc = self.calc
+        for enter, exit in calc.activators:
+            self.entered.append((exit, enter()))
+        calc._activations.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.calc._activations.remove(self)
+        while self.entered:
+            exit, token = self.entered.pop()
+            exit(token)
+
+    def enter(self, enter, exit):
+        """Call an activator registered while this activation is active."""
+        self.entered.append((exit, enter()))
+
+    def leave(self, exit):
+        """Call ``exit`` of an activator deregistered while this
+        activation is active."""
+        for i, (entered_exit, token) in enumerate(self.entered):
+            if entered_exit == exit:
+                del self.entered[i]
+                exit(token)
+                break
+
+
+_MISSING = object()
+
+
+class ResultCache:
+    """
+    LRU cache of results of pure operations (see ``Operation``) used by
+    ``Calculator``. It holds at most ``max_entries`` results and results of
+    at most ``max_bytes`` bytes (estimated using ``sys.getsizeof``), the
+    least recently used results are evicted first. A ``max_entries`` of 0
+    disables caching.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=64 * 2**20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self.entries = OrderedDict()
+        """Mapping keys to tuples ``(result, size)``."""
+        self.bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return the result cached for ``key`` or ``_MISSING``."""
+        try:
+            result, size = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return _MISSING
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return result
+
+    def put(self, key, result, size):
+        """Cache ``result`` for ``key``, ``size`` is its estimated size in
+        bytes. Results larger than ``max_bytes`` are not cached."""
+        if size > self.max_bytes:
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.bytes -= old[1]
+        self.entries[key] = (result, size)
+        self.bytes += size
+        self._evict()
+
+    def resize(self, max_entries=None, max_bytes=None):
+        """Change the limits of this cache and evict results exceeding
+        them."""
+        if max_entries is not None:
+            self.max_entries = max_entries
+        if max_bytes is not None:
+            self.max_bytes = max_bytes
+        self._evict()
+
+    def _evict(self):
+        while self.entries and (len(self.entries) > self.max_entries or
+                                self.bytes > self.max_bytes):
+            self.bytes -= self.entries.popitem(last=False)[1][1]
+
+    def clear(self):
+        """Remove all results and reset the statistics."""
+        self.entries.clear()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __str__(self):
+        lookups = self.hits + self.misses
+        hit_rate = self.hits / lookups if lookups else 0
+        return ('result cache: {} of {} entries, {:.1f} of {:.1f} KiB, '
+                '{} hits, {} misses (hit rate {:.1%})'.format(
+                    len(self.entries), self.max_entries, self.bytes / 1024,
+                    self.max_bytes / 1024, self.hits, self.misses,
+                    hit_rate))
+
+
+def _value_key(value):
+    # Values comparing equal may still differ, e.g. Decimal('1.0') and
+    # Decimal('1.00') give differently formatted results.
+    return type(value), str(value)
+
+
+def _entry_size(key, result):
+    size = sys.getsizeof(key) + sum(
+        sys.getsizeof(value) for _, value in key[1])
+    if isinstance(result, tuple):
+        return size + sum(map(sys.getsizeof, result))
+    return size + sys.getsizeof(result)
+
+
+class _Stopwatch:
+    """Callable wrapper of ``func`` adding the time spent in it to
+    ``elapsed``."""
+
+    __slots__ = ('func', 'elapsed')
+
+    def __init__(self, func):
+        self.func = func
+        self.elapsed = 0.0
+
+    def __call__(self, *args):
+        start = time.perf_counter()
+        try:
+            return self.func(*args)
+        finally:
+            self.elapsed += time.perf_counter() - start
 
 
 class Calculator:
@@ -659,74 +1036,353 @@ class Calculator:
         self.modules = []
         self.numeric_types = []
 
-    def load_module_by_name(self, module_name):
-        # try to load "littlecalc.modules.MODULE_NAME" first
+        self.operations = {}
+        """Dispatch index mapping every operation name and alias of all
+        loaded modules to a tuple ``(module, operation, calc_method)``.
+        ``calc_method`` is None if the operation has no ``'calc'``
+        method."""
+
+        self.lazy_modules = {}
+        """Mapping names of lazily registered modules to their manifests."""
+
+        self.lazy_operations = {}
+        """Mapping operation names of lazily registered modules to the
+        module names."""
+
+        self.generation = 0
+        """Incremented whenever a module is loaded or unloaded to invalidate
+        compiled programs."""
+
+        self.activators = []
+        """List of ``(enter, exit)`` function pairs, see
+        ``Calculator.register_activator``."""
+        self._activations = []
+
+        self.context_keys = []
+        """List of functions returning the state results of pure operations
+        depend on, see ``Calculator.register_context_key``."""
+
+        self.result_cache = ResultCache()
+        """Cache of results of pure operations, see ``ResultCache``."""
+
+        self._callables = {}
+        """Cache of callables returned by ``get_callable``."""
+
+        self.instruments = []
+        """Objects notified about every operation and line evaluated, see
+        ``Calculator.add_instrument``."""
+
+        self.profile = None
+        """The ``littlecalc.profiling.Profile`` being recorded or None, see
+        ``Calculator.enable_profiling``."""
+
+    def _find_module_spec(self, module_name):
+        # try to find "littlecalc.modules.MODULE_NAME" first
         full_name = 'littlecalc.modules.{}'.format(module_name)
         spec = importlib.util.find_spec(full_name)
 
         if spec is None:
-            # try to load module with given name directly
+            # try to find module with given name directly
             spec = importlib.util.find_spec(module_name)
 
         if spec is None:
             raise CalculatorError(
                 'module {!r} cannot be found'.format(module_name))
+        return spec
 
-        module = importlib.util.module_from_spec(spec)
+    def load_module_by_name(self, module_name, lazy=False):
+        """
+        Import the Python module ``module_name`` (looked up in
+        ``littlecalc.modules`` first) and load the modules returned by its
+        ``get_modules`` function.
+
+        If ``lazy`` is True and the Python module declares a manifest (see
+        ``read_manifest``), only the names listed in its manifest are
+        registered. The module is imported and loaded the first time one of
+        its operations is used or, if it provides numeric types, the first
+        time a word is neither numeric nor an operation.
+
+        A module already registered lazily is loaded immediately if
+        ``lazy`` is False (see ``load_lazy_module``).
+        """
+        if not lazy and module_name in self.lazy_modules:
+            self.load_lazy_module(module_name)
+            return
+
+        spec = self._find_module_spec(module_name)
+
+        if lazy:
+            manifest = read_manifest(spec)
+            if manifest is not None:
+                self.register_lazy_module(module_name, manifest)
+                return
+
+        with tracing.span('load {}', 'module', name_args=(module_name,)):
+            try:
+                module = importlib.import_module(spec.name)
+            except Exception as err:
+                raise ModuleLoadError(
+                    'error loading module {!r}'.format(module_name)) from err
+
+            calc_modules = module.get_modules(self)
+            # TODO: for now load all modules
+            for calc_module in calc_modules:
+                self.load_module(calc_module)
+
+    def register_lazy_module(self, module_name, manifest):
+        """
+        Register the operation names of a module's ``manifest`` (see
+        ``read_manifest``) without loading it. ``module_name`` is loaded
+        by ``load_lazy_module`` on first use. An ``AliasingError`` is
+        raised if a name is already provided by another module.
+        """
+        names = manifest.get('operations', ())
+        for name in names:
+            other = self.operations.get(name, None)
+            if other is not None:
+                other = other[0].name
+            else:
+                other = self.lazy_operations.get(name, None)
+            if other is not None:
+                raise AliasingError(
+                    'operation {!r} of module {!r} is already provided by '
+                    'module {!r}'.format(name, module_name, other))
+
+        self.lazy_modules[module_name] = manifest
+        for name in names:
+            self.lazy_operations[name] = module_name
+
+    def load_lazy_module(self, module_name):
+        """Load a module registered by ``register_lazy_module``."""
+        manifest = self.lazy_modules.pop(module_name)
+        for name in manifest.get('operations', ()):
+            if self.lazy_operations.get(name, None) == module_name:
+                del self.lazy_operations[name]
+
+        if not manifest.get('numeric_types', None):
+            # Operations work on numbers, so load numeric types first instead
+            # of loading them in the middle of some operation.
+            while self._load_lazy_numeric_types():
+                pass
+
+        self.load_module_by_name(module_name)
+
+    def _load_lazy_numeric_types(self):
+        """Load the first lazily registered module which provides numeric
+        types. Returns False if there is no such module."""
+        for module_name, manifest in self.lazy_modules.items():
+            if manifest.get('numeric_types', None):
+                self.load_lazy_module(module_name)
+                return True
+        return False
+
+    def _resolve(self, name):
+        """Return the dispatch entry of operation ``name``, loading a lazily
+        registered module if required."""
         try:
-            spec.loader.exec_module(module)
-        except Exception as err:
-            raise ModuleLoadError(
-                'error loading module {!r}'.format(module_name)) from err
+            return self.operations[name]
+        except KeyError:
+            pass
 
-        calc_modules = module.get_modules(self)
-        # TODO: for now load all modules
-        for calc_module in calc_modules:
-            self.load_module(calc_module)
+        module_name = self.lazy_operations.get(name, None)
+        if module_name is not None:
+            self.load_lazy_module(module_name)
+            if name in self.operations:
+                return self.operations[name]
+        raise NoSuchOperation(name)
 
     def load_module(self, module):
+        """Load ``module`` and add its operations to the dispatch index.
+
+        An ``AliasingError`` is raised (and the module is not loaded) if
+        one of its operation names or aliases is already provided by
+        another loaded module."""
+        entries = {}
+        for name, operation in module._operation_names.items():
+            if name in self.operations:
+                other = self.operations[name][0].name
+            else:
+                other = self.lazy_operations.get(name, None)
+            if other is not None:
+                raise AliasingError(
+                    'operation {!r} of module {!r} is already provided by '
+                    'module {!r}'.format(name, module.name, other))
+            entries[name] = (module, operation, self._calc_method(operation))
+
         module.load_module(self)
         self.modules.append(module)
+        self.operations.update(entries)
+        self._callables.clear()
+        self.generation += 1
 
     def unload_module_by_name(self, module_name):
+        if module_name in self.lazy_modules:
+            manifest = self.lazy_modules.pop(module_name)
+            for name in manifest.get('operations', ()):
+                if self.lazy_operations.get(name, None) == module_name:
+                    del self.lazy_operations[name]
+            return
+
         module_to_unload = None
         for module in self.modules:
             if module_name == module.name:
                 module_to_unload = module
                 break
 
-        if module_name is None:
+        if module_to_unload is None:
             raise CalculatorError('no such module {!r}'.format(module_name))
 
         self.unload_module(module_to_unload)
 
     def unload_module(self, module):
-        module.unload_module()
+        with tracing.span('unload {}', 'module', name_args=(module.name,)):
+            module.unload_module()
         self.modules.remove(module)
 
+        for name in module._operation_names:
+            entry = self.operations.get(name, None)
+            if entry is not None and entry[0] is module:
+                del self.operations[name]
+        self._callables.clear()
+        self.generation += 1
+
+    def register_activator(self, enter, exit):
+        """
+        Register functions to be called around every evaluation
+        (``parse_input``, ``run`` and ``do_operation``). Modules use this to
+        install state owned by this calculator, e.g. a decimal context, in
+        thread-local or context-local variables.
+
+        ``enter()`` is called before evaluating, its return value is passed
+        to ``exit(token)`` afterwards to restore the previous state. If
+        this calculator is currently evaluating (e.g. a module is loaded by
+        an operation), ``enter`` is called immediately.
+        """
+        self.activators.append((enter, exit))
+        for activation in self._activations:
+            activation.enter(enter, exit)
+
+    def deregister_activator(self, enter, exit):
+        self.activators.remove((enter, exit))
+        for activation in reversed(self._activations):
+            activation.leave(exit)
+
+    def register_context_key(self, func):
+        """
+        Register a function returning a hashable description of state owned
+        by a module which results of pure operations depend on, e.g. the
+        precision and rounding mode of a decimal context. Its return value
+        is part of the key of every result cached (see ``ResultCache``).
+        """
+        self.context_keys.append(func)
+
+    def deregister_context_key(self, func):
+        self.context_keys.remove(func)
+
+    def _calc_method(self, operation):
+        """Return the method called when ``operation`` is invoked from the
+        prompt, which is stored in the dispatch index."""
+        calc_method = operation.methods.get('calc', None)
+        if operation.pure and 'stack' in operation.methods:
+            calc_method = self._caching_method(operation)
+        if calc_method is not None and self.instruments:
+            calc_method = self._instrumented_method(operation, calc_method)
+        return calc_method
+
+    def _caching_method(self, operation):
+        """Return a ``'calc'`` method for the pure ``operation`` caching
+        its results in ``self.result_cache``."""
+        func = operation.methods['stack']
+        arg_count = operation.arg_count
+        push_multiple = operation.push_multiple
+        cache = self.result_cache
+        context_keys = self.context_keys
+
+        def wrapper(module, calc):
+            stack = calc.stack
+            if arg_count == 1:
+                values = (stack.pop1(),)
+            else:
+                values = stack.pop(arg_count)
+
+            if cache.max_entries:
+                key = (operation, tuple(map(_value_key, values)),
+                       tuple(context_key() for context_key in context_keys))
+                result = cache.get(key)
+                if result is _MISSING:
+                    result = func(*values)
+                    cache.put(key, result, _entry_size(key, result))
+            else:
+                result = func(*values)
+
+            if push_multiple:
+                stack.stack.extend(result)
+            else:
+                stack.stack.append(result)
+        return functools.wraps(func)(wrapper)
+
+    def _instrumented_method(self, operation, func):
+        """Return a ``'calc'`` method calling ``func`` and reporting the time
+        spent to all instruments (see ``Calculator.add_instrument``)."""
+        instruments = self.instruments
+        name = operation.name
+        perf_counter = time.perf_counter
+
+        def wrapper(module, calc):
+            start = perf_counter()
+            try:
+                func(module, calc)
+            finally:
+                end = perf_counter()
+                for instrument in instruments:
+                    instrument.record_operation(name, start, end)
+        return functools.wraps(func)(wrapper)
+
+    def _update_dispatch_index(self):
+        """Rebuild the methods of the dispatch index after instruments were
+        attached or detached. Compiled programs are recompiled."""
+        for name, (module, operation, _) in self.operations.items():
+            self.operations[name] = (
+                module, operation, self._calc_method(operation))
+        self.generation += 1
+
+    def activated(self):
+        """Return a context manager calling all registered activators.
+        Use it when calling operations' methods directly::
+
+            with calc.activated():
+                value = calc.get_callable('const')('pi')
+        """
+        return _Activation(self)
+
     def register_numeric_type(self, cls):
         self.numeric_types.append(cls)
 
     def deregister_numeric_type(self, cls):
         self.numeric_types.remove(cls)
 
-    def is_numeric(self, word):
+    def try_parse(self, word):
+        """Return the numeric value of ``word`` using the first registered
+        numeric type accepting it or ``NOT_NUMERIC``."""
         for numeric_type in self.numeric_types:
-            if numeric_type.is_numeric(word):
-                return True
-        return False
+            value = numeric_type.try_parse(word)
+            if value is not NOT_NUMERIC:
+                return value
+        return NOT_NUMERIC
+
+    def is_numeric(self, word):
+        return self.try_parse(word) is not NOT_NUMERIC
 
     def to_numeric(self, word):
-        for numeric_type in self.numeric_types:
-            if numeric_type.is_numeric(word):
-                return numeric_type.to_numeric(word)
-        raise NotNumeric(word)
+        value = self.try_parse(word)
+        while value is NOT_NUMERIC:
+            if not self._load_lazy_numeric_types():
+                raise NotNumeric(word)
+            value = self.try_parse(word)
+        return value
 
     def is_executable(self, word):
-        for module in self.modules:
-            if module.is_executable(word):
-                return True
-        return False
+        return word in self.operations or word in self.lazy_operations
 
     def get_module(self, module_name):
         """Return module with given name, return None if no such
@@ -737,29 +1393,221 @@ class Calculator:
         return None
 
     def find_module_of_operation(self, operation):
-        for module in self.modules:
-            if module.is_executable(operation):
-                return module
-        raise NoSuchOperation(operation)
+        return self._resolve(operation)[0]
+
+    def get_callable(self, name, type='remote'):
+        """
+        Return a callable of the given method ``type`` for the operation
+        ``name`` of any loaded module (see ``Operation``). Callables are
+        cached until a module is loaded or unloaded.
+        """
+        try:
+            return self._callables[name, type]
+        except KeyError:
+            pass
+
+        module, operation, calc_func = self._resolve(name)
+
+        func = operation.get_callable(type, calc=self, module=module)
+        self._callables[name, type] = func
+        return func
 
     def do_operation(self, name):
         """Invokes the desired operation."""
-        module = self.find_module_of_operation(name)
-        module.do_operation(name)
+        with self.activated():
+            self._dispatch(name)
+
+    def _dispatch(self, name):
+        """Invokes the desired operation without activating this
+        calculator (see ``Calculator.activated``)."""
+        try:
+            module, operation, func = self.operations[name]
+        except KeyError:
+            module, operation, func = self._resolve(name)
+
+        if func is None:
+            raise CalculatorError(
+                'operation {!r} cannot be called from the prompt'.format(name))
+        func(module, self)
 
     def parse_input(self, input_):
-        self.input_stream = ConsumingInputStream(input_.split())
+        instrumented = bool(self.instruments)
+        if instrumented:
+            line_start = time.perf_counter()
+        words = input_.split()
+        try_parse = self.try_parse
+        if instrumented:
+            tokenize_time = time.perf_counter() - line_start
+            try_parse = _Stopwatch(try_parse)
+
+        self.input_stream = ConsumingInputStream(words)
+        try:
+            with self.activated():
+                for word in self.input_stream:
+                    x = try_parse(word)
+                    if x is not NOT_NUMERIC:
+                        self.stack.push(x)
+                    elif (word in self.operations or
+                          word in self.lazy_operations):
+                        self._dispatch(word)
+                    else:
+                        self._parse_unknown_word(word)
+        finally:
+            if instrumented:
+                self._record_line(input_, line_start, len(words),
+                                  tokenize_time, try_parse.elapsed)
+
+        self.input_stream = None
 
-        for word in self.input_stream:
-            if self.is_numeric(word):
-                x = self.to_numeric(word)
+    def _parse_unknown_word(self, word):
+        """Load lazily registered numeric types until ``word`` is known."""
+        while self._load_lazy_numeric_types():
+            x = self.try_parse(word)
+            if x is not NOT_NUMERIC:
                 self.stack.push(x)
-            elif self.is_executable(word):
-                self.do_operation(word)
-            else:
-                print('UNKNOWN INPUT:', word)
+                return
+            elif word in self.operations:
+                self._dispatch(word)
+                return
+        self.unknown_word(word)
+
+    def unknown_word(self, word):
+        """Called by ``parse_input`` for words which are neither numeric nor
+        an operation."""
+        print('UNKNOWN INPUT:', word)
+
+    def compile(self, input_):
+        """
+        Compile a line of input into a ``Program`` which can be executed
+        repeatedly by ``Calculator.run`` without splitting, classifying
+        and resolving its words again.
+
+        Numeric words are converted once, operations are resolved to their
+        ``'calc'`` methods and the words an operation pulls from the input
+        stream (see ``Operation.stream_args``) are captured. Therefore all
+        operations must be available when compiling, a ``NoSuchOperation``
+        error is raised for unknown words.
+        """
+        words = input_.split()
+        steps = []
+        operations = []
+
+        i = 0
+        while i < len(words):
+            word = words[i]
+            i += 1
+
+            x = self.try_parse(word)
+            if x is not NOT_NUMERIC:
+                steps.append((None, x, None))
+                operations.append(None)
+                continue
+
+            if (word not in self.operations and
+                    word not in self.lazy_operations and
+                    self._load_lazy_numeric_types()):
+                i -= 1  # retry
+                continue
+
+            module, operation, func = self._resolve(word)
+            if func is None:
+                raise CalculatorError(
+                    'operation {!r} cannot be called from the '
+                    'prompt'.format(word))
+
+            stream = None
+            if operation.stream_args:
+                count = operation.stream_args
+                if callable(count):
+                    count = count(words[i:])
+                stream = tuple(words[i:i + count])
+                i += len(stream)
+            steps.append((func, module, stream))
+            operations.append(operation)
+
+        return Program(input_, steps, operations, self.generation)
+
+    def run(self, program):
+        """
+        Execute a ``Program`` returned by ``Calculator.compile``. The
+        program is recompiled first if modules were loaded or unloaded
+        since it was compiled.
+        """
+        if program.generation != self.generation:
+            compiled = self.compile(program.source)
+            program.steps = compiled.steps
+            program.operations = compiled.operations
+            program.generation = compiled.generation
 
-        self.input_stream = None
+        instrumented = bool(self.instruments)
+        if instrumented:
+            line_start = time.perf_counter()
+
+        push = self.stack.push
+        try:
+            with self.activated():
+                for func, arg, stream in program.steps:
+                    if func is None:
+                        push(arg)
+                    elif stream is None:
+                        func(arg, self)
+                    else:
+                        self.input_stream = ConsumingInputStream(stream)
+                        func(arg, self)
+        finally:
+            self.input_stream = None
+            if instrumented:
+                self._record_line(program.source, line_start, 0, 0.0, 0.0)
+
+    def _record_line(self, source, start, words, tokenize_time, parse_time):
+        end = time.perf_counter()
+        for instrument in self.instruments:
+            instrument.record_line(source, start, end, words, tokenize_time,
+                                   parse_time)
+
+    def add_instrument(self, instrument):
+        """
+        Report the time spent in every operation and line to
+        ``instrument`` (see ``littlecalc.profiling``). While there are
+        instruments, the methods in the dispatch index are wrapped to time
+        every operation, so there is no overhead per operation without
+        instruments.
+        """
+        if instrument in self.instruments:
+            return
+        self.instruments.append(instrument)
+        if len(self.instruments) == 1:
+            self._update_dispatch_index()
+
+    def remove_instrument(self, instrument):
+        if instrument not in self.instruments:
+            return
+        self.instruments.remove(instrument)
+        if not self.instruments:
+            self._update_dispatch_index()
+
+    def enable_profiling(self):
+        """Record the time spent in every operation and in splitting and
+        parsing input into ``self.profile`` until ``disable_profiling`` is
+        called."""
+        from littlecalc import profiling
+
+        if self.profile is None:
+            self.profile = profiling.Profile()
+        self.add_instrument(self.profile)
+
+    def disable_profiling(self):
+        """Stop profiling, the data collected so far is kept in
+        ``self.profile``."""
+        if self.profile is not None:
+            self.remove_instrument(self.profile)
+
+    def get_profile(self):
+        """Return the data collected by profiling as a dict (see
+        ``Profile.as_dict``) or None if profiling was never enabled."""
+        if self.profile is None:
+            return None
+        return self.profile.as_dict()
 
     def output(self, text):
         """
@@ -0,0 +1,508 @@
+# littlecalc
+# Copyright (C) 2017  Maximilian Timmerkamp
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Arbitrary precision helpers for Decimals shared by the ``decimal`` and
+``constants`` modules.
+"""
+
+import _thread
+import contextlib
+import decimal
+import functools
+import math
+from collections import OrderedDict
+
+from littlecalc import tracing
+
+
+GUARD_DIGITS = 10
+"""Additional digits used when computing fundamental constants."""
+
+PI_BINARY_SPLITTING_THRESHOLD = 20
+E_BINARY_SPLITTING_THRESHOLD = 1300
+"""Precisions (in digits) from which on pi and e are computed using binary
+splitting instead of the simple iterations, which are faster for small
+precisions. Measured using ``benchmarks/bench_binary_splitting.py``."""
+
+LN_AGM_THRESHOLD = 150
+EXP_NEWTON_THRESHOLD = 300
+"""Precisions (in digits) from which on ``ln`` uses the arithmetic-geometric
+mean and ``exp`` uses Newton's iteration instead of ``Decimal.ln`` and
+``Decimal.exp``. Measured using ``benchmarks/bench_ln_exp.py``, they can be
+changed to tune for other hardware."""
+
+LN_BASE_CACHE_SIZE = 32
+"""Maximum number of bases whose logarithms are cached by ``ln_base``."""
+
+FIXED_POINT_GUARD_BITS = 10
+
+_INT_CONVERSION_BITS = 10000
+_LOG10_2 = math.log10(2)
+
+
+class ConstantProvider:
+    """
+    Provides a fundamental constant (like pi) to any precision.
+
+    The most precise value computed so far is kept. Requests for a lower
+    precision are answered by rounding this value, only requests for a
+    higher precision cause a new computation. The precision is at least
+    doubled on every recomputation, so a series of slowly increasing
+    precisions costs about as much as computing the final precision
+    directly.
+
+    ``compute`` is a function returning the constant with the precision of
+    the current context.
+    """
+
+    def __init__(self, name, compute):
+        self.name = name
+        self.compute = compute
+        self._known = (0, None)  # (precision, value)
+
+    @property
+    def precision(self):
+        """The number of digits currently known."""
+        return self._known[0]
+
+    def get(self, context=None):
+        """Return the constant rounded to the precision of ``context``
+        (the current context by default)."""
+        if context is None:
+            context = decimal.getcontext()
+
+        known_prec, value = self._known
+        if context.prec > known_prec:
+            known_prec = max(context.prec, 2 * known_prec)
+            with decimal.localcontext() as ctx, tracing.span(
+                    'compute {}', 'constant', {'precision': known_prec},
+                    name_args=(self.name,)):
+                ctx.prec = known_prec + GUARD_DIGITS
+                ctx.rounding = decimal.ROUND_HALF_EVEN
+                value = self.compute()
+            self._known = (known_prec, value)
+
+        return context.plus(value)
+
+    def reset(self):
+        """Forget the known value."""
+        self._known = (0, None)
+
+    def __repr__(self):
+        return '<ConstantProvider: {} known to {} digits>'.format(
+            self.name, self.precision)
+
+
+def binary_splitting(a, p, q, start, end):
+    """
+    Sum the hypergeometric series ``sum(a(k) * P(k) / Q(k))`` for ``k`` in
+    ``range(start, end)`` where ``P(k) = p(start) * ... * p(k)`` and
+    ``Q(k) = q(start) * ... * q(k)``. ``a``, ``p`` and ``q`` have to return
+    Python ints.
+
+    Returns a tuple of ints ``(P, Q, T)`` with ``P = P(end - 1)``,
+    ``Q = Q(end - 1)`` and the sum being ``T / Q``. The range is halved
+    recursively, so the big numbers are only multiplied with numbers of
+    similar size, which is much faster than summing the series term by
+    term.
+    """
+    if end - start == 1:
+        pk = p(start)
+        return pk, q(start), a(start) * pk
+
+    mid = (start + end) // 2
+    p1, q1, t1 = binary_splitting(a, p, q, start, mid)
+    p2, q2, t2 = binary_splitting(a, p, q, mid, end)
+    return p1 * p2, q1 * q2, t1 * q2 + p1 * t2
+
+
+def int_to_decimal(x):
+    """
+    Convert the int ``x`` to a Decimal rounded to current precision.
+
+    ``Decimal(x)`` needs quadratic time for big numbers. Here ``x`` is split
+    into halves recursively which are converted and combined using
+    (subquadratic) Decimal multiplication.
+    """
+    powers = {}
+
+    def convert(x):
+        bits = x.bit_length()
+        if bits <= _INT_CONVERSION_BITS:
+            return decimal.Decimal(x)
+        shift = bits // 2
+        high = x >> shift
+        low = x - (high << shift)
+        power = powers.get(shift)
+        if power is None:
+            power = powers[shift] = decimal.Decimal(2) ** shift
+        return convert(high) * power + convert(low)
+
+    return convert(x)
+
+
+def ratio_to_decimal(numerator, denominator):
+    """Return ``numerator / denominator`` for (big) ints rounded to current
+    precision."""
+    # Low bits do not influence the result.
+    bits = int((decimal.getcontext().prec + GUARD_DIGITS) / _LOG10_2) + 1
+    shift = min(numerator.bit_length(), denominator.bit_length()) - bits
+    if shift > 0:
+        numerator >>= shift
+        denominator >>= shift
+    return int_to_decimal(numerator) / int_to_decimal(denominator)
+
+
+def fixed_point_bits(digits):
+    """Return the number of bits needed for ``digits`` decimal digits
+    (plus a few guard bits) in fixed-point arithmetic."""
+    return int(digits / _LOG10_2) + FIXED_POINT_GUARD_BITS
+
+
+def to_fixed(x, bits):
+    """Return the Decimal ``x`` as fixed-point number, that is the int
+    nearest to ``x * 2**bits``."""
+    with _unbounded_exponents() as ctx:
+        ctx.prec = max(x.adjusted() + 1, 0) + int(bits * _LOG10_2) + 3
+        return int((x * decimal.Decimal(2)**bits).to_integral_value())
+
+
+def from_fixed(n, bits):
+    """Return the fixed-point number ``n`` (see ``to_fixed``) as Decimal
+    rounded to current precision."""
+    with _unbounded_exponents():
+        value = int_to_decimal(n) / decimal.Decimal(2)**bits
+    return +value
+
+
+def sqrt(x):
+    """
+    Return the square root of the positive Decimal ``x`` to current
+    precision.
+
+    Uses Newton's iteration doubling the precision in every step, which is
+    much faster than ``Decimal.sqrt`` for high precisions.
+    """
+    context = decimal.getcontext()
+    precisions = []
+    prec = context.prec
+    while prec > 15:
+        precisions.append(prec)
+        prec = prec // 2 + 1
+
+    # x = m * 10^(2k) with m in float range
+    k = x.adjusted() // 2
+    with decimal.localcontext() as ctx:
+        ctx.prec = prec
+        s = decimal.Decimal(math.sqrt(x.scaleb(-2 * k))).scaleb(k)
+        for prec in reversed(precisions):
+            ctx.prec = prec + 3
+            s = (s + x / s) / 2
+    return context.plus(s)
+
+
+@contextlib.contextmanager
+def _unbounded_exponents():
+    """Allow the big intermediate numbers of binary splitting."""
+    with decimal.localcontext() as ctx:
+        ctx.Emax = decimal.MAX_EMAX
+        ctx.Emin = decimal.MIN_EMIN
+        yield ctx
+
+
+_CHUDNOVSKY_C3_24 = 640320**3 // 24
+_CHUDNOVSKY_DIGITS_PER_TERM = math.log10(640320**3 / 1728)
+
+
+def compute_pi_chudnovsky():
+    """Compute pi to current precision using the Chudnovsky series summed
+    by binary splitting."""
+    terms = int(decimal.getcontext().prec / _CHUDNOVSKY_DIGITS_PER_TERM) + 2
+
+    def a(k):
+        return 13591409 + 545140134 * k
+
+    def p(k):
+        if k == 0:
+            return 1
+        return -(6 * k - 5) * (2 * k - 1) * (6 * k - 1)
+
+    def q(k):
+        if k == 0:
+            return 1
+        return k * k * k * _CHUDNOVSKY_C3_24
+
+    _, q_sum, t_sum = binary_splitting(a, p, q, 0, terms)
+    with _unbounded_exponents() as ctx:
+        ctx.prec += 5
+        v = 426880 * sqrt(decimal.Decimal(10005)) * ratio_to_decimal(
+            q_sum, t_sum)
+    return +v
+
+
+def compute_e_binary_splitting():
+    """Compute Euler's number to current precision by summing ``1/k!``
+    using binary splitting."""
+    # Sum until log10(terms!) exceeds the precision.
+    digits = decimal.getcontext().prec + GUARD_DIGITS
+    terms = 2
+    while math.lgamma(terms + 1) / math.log(10) < digits:
+        terms += terms // 8 + 1
+
+    def one(k):
+        return 1
+
+    def q(k):
+        return k or 1
+
+    _, q_sum, t_sum = binary_splitting(one, one, q, 0, terms)
+    with _unbounded_exponents():
+        v = ratio_to_decimal(t_sum, q_sum)
+    return +v
+
+
+def compute_pi():
+    """Compute pi to current precision. Uses the Chudnovsky series (see
+    ``compute_pi_chudnovsky``) for high precisions."""
+    if decimal.getcontext().prec >= PI_BINARY_SPLITTING_THRESHOLD:
+        return compute_pi_chudnovsky()
+    return compute_pi_gauss_legendre()
+
+
+def compute_pi_gauss_legendre():
+    """Compute pi to current precision using the Gauss-Legendre
+    algorithm."""
+    D = decimal.Decimal
+
+    # Gauss-Legendre algorithm
+    an, bn, tn, pn = D(1), 1 / D(2).sqrt(), 1 / D(4), 1
+    v, lastv = 0, 1
+    while v != lastv:
+        a, b, t, p = an, bn, tn, pn
+
+        an = (a + b) / 2
+        bn = (a * b).sqrt()
+        tn = t - p * (a - an)**2
+        pn = 2 * p
+
+        lastv = v
+        v = (an + bn)**2 / (4 * tn)
+    return v
+
+
+def compute_e():
+    """Compute Euler's number to current precision. Uses binary splitting
+    (see ``compute_e_binary_splitting``) for high precisions."""
+    if decimal.getcontext().prec >= E_BINARY_SPLITTING_THRESHOLD:
+        return compute_e_binary_splitting()
+    return compute_e_taylor()
+
+
+def compute_e_taylor():
+    """Compute Euler's number to current precision using its Taylor series
+    summed in fixed-point arithmetic (see ``to_fixed``)."""
+    bits = fixed_point_bits(decimal.getcontext().prec)
+    s = term = 1 << bits
+    i = 0
+    while term:
+        i += 1
+        term //= i
+        s += term
+    return from_fixed(s, bits)
+
+
+def compute_ln2():
+    """Compute ln(2) to current precision. For high precisions
+    ``ln(2**m) = m ln(2)`` is computed using the arithmetic-geometric mean
+    (see ``ln_agm``)."""
+    prec = decimal.getcontext().prec
+    if prec < LN_AGM_THRESHOLD:
+        return decimal.Decimal(2).ln()
+
+    m = _agm_bits(prec)
+    with decimal.localcontext() as ctx:
+        ctx.prec += len(str(m))
+        value = _ln_large(decimal.Decimal(2)**m) / m
+    return +value
+
+
+def compute_ln10():
+    return ln(decimal.Decimal(10))
+
+
+PI = ConstantProvider('pi', compute_pi)
+E = ConstantProvider('e', compute_e)
+LN2 = ConstantProvider('ln2', compute_ln2)
+LN10 = ConstantProvider('ln10', compute_ln10)
+
+
+def pi():
+    """Return pi rounded to current precision."""
+    return PI.get()
+
+
+def e():
+    """Return Euler's number rounded to current precision."""
+    return E.get()
+
+
+def ln2():
+    """Return ln(2) rounded to current precision."""
+    return LN2.get()
+
+
+def ln10():
+    """Return ln(10) rounded to current precision."""
+    return LN10.get()
+
+
+_LN_BASES = OrderedDict()
+"""LRU cache mapping bases to ``ConstantProvider`` instances of their
+logarithms, see ``ln_base``."""
+
+# Calculators may run in separate threads (see Calculator.activated), this
+# guards the LRU bookkeeping of _LN_BASES. _thread.allocate_lock is
+# threading.Lock without importing threading at startup.
+_LN_BASES_LOCK = _thread.allocate_lock()
+
+
+def ln_base(b):
+    """
+    Return the natural logarithm of the Decimal ``b`` rounded to current
+    precision. Logarithms of positive bases are cached (like constants, see
+    ``ConstantProvider``) as logarithms are usually taken to the same few
+    bases, ``ln_base(2)`` and ``ln_base(10)`` are ``ln2()`` and ``ln10()``.
+    """
+    if b == 2:
+        return ln2()
+    if b == 10:
+        return ln10()
+    if not b.is_finite() or b <= 0:
+        return ln(b)
+
+    with _LN_BASES_LOCK:
+        provider = _LN_BASES.get(b, None)
+        if provider is None:
+            provider = ConstantProvider('ln({})'.format(b),
+                                        functools.partial(ln, b))
+            _LN_BASES[b] = provider
+            if len(_LN_BASES) > LN_BASE_CACHE_SIZE:
+                _LN_BASES.popitem(last=False)
+        else:
+            _LN_BASES.move_to_end(b)
+    # computed outside of the lock, ConstantProvider needs no locking
+    return provider.get()
+
+
+def agm(a, b):
+    """Return the arithmetic-geometric mean of the positive Decimals ``a``
+    and ``b`` to current precision."""
+    # convergence is quadratic, so the step after a, b agree to half the
+    # precision is the last one needed
+    half_precision = decimal.Decimal(1).scaleb(
+        -(decimal.getcontext().prec // 2) - 1)
+    while abs(a - b) > half_precision * a:
+        a, b = (a + b) / 2, sqrt(a * b)
+    return (a + b) / 2
+
+
+def _agm_bits(prec):
+    """Return the number of bits ``s`` has to have for ``_ln_large(s)`` to
+    be accurate to ``prec`` digits."""
+    return int(prec / _LOG10_2 / 2) + 10
+
+
+def _ln_large(s):
+    """Return ``ln(s) ~ pi / (2 AGM(1, 4/s))`` for
+    ``s > 2**_agm_bits(prec)``."""
+    return pi() / (2 * agm(decimal.Decimal(1), 4 / s))
+
+
+def ln_agm(x):
+    """
+    Return the natural logarithm of the positive Decimal ``x`` to current
+    precision using the arithmetic-geometric mean::
+
+        ln(x) ~ pi / (2 AGM(1, 4/s)) - m ln(2)
+
+    where ``s = x * 2**m`` is large enough. pi and ln(2) are cached (see
+    ``ConstantProvider``).
+    """
+    context = decimal.getcontext()
+    distance = x - 1
+    if not distance:
+        return decimal.Decimal(0)
+
+    with _unbounded_exponents() as ctx:
+        # for x close to 1 the result is small, the AGM has to be accurate
+        # to the digits lost this way
+        ctx.prec += max(-distance.adjusted(), 0) + 2
+        bits = _agm_bits(ctx.prec)
+        m = bits - int((x.adjusted() + 1) / _LOG10_2) + 1
+        # m ln(2) is subtracted from ln(s), which is about as large
+        ctx.prec += len(str(abs(m)))
+        value = _ln_large(x * decimal.Decimal(2)**m) - m * ln2()
+    return context.plus(value)
+
+
+def exp_newton(x):
+    """
+    Return ``e**x`` for the Decimal ``x`` to current precision using
+    Newton's iteration on the logarithm::
+
+        y_{n+1} = y_n (1 + x - ln(y_n))
+
+    The precision is doubled in every step, starting from ``Decimal.exp``
+    at low precision.
+    """
+    context = decimal.getcontext()
+    # the absolute error of ln(y) is the relative error of y, so the digits
+    # before the decimal point of x are needed in addition
+    extra = max(x.adjusted() + 1, 0) + 3
+    precisions = []
+    prec = context.prec + extra
+    while prec > EXP_NEWTON_THRESHOLD // 2:
+        precisions.append(prec)
+        prec = prec // 2 + extra
+
+    with _unbounded_exponents() as ctx:
+        ctx.prec = prec
+        y = x.exp()
+        for prec in reversed(precisions):
+            ctx.prec = prec
+            y = y * (1 + x - ln(y))
+    return context.plus(y)
+
+
+def ln(x):
+    """Return the natural logarithm of ``x`` to current precision using
+    ``ln_agm`` for high precisions (see ``LN_AGM_THRESHOLD``)."""
+    # x > 0 signals InvalidOperation for NaN, so check is_finite first
+    if decimal.getcontext().prec >= LN_AGM_THRESHOLD and x.is_finite() and \
+            x > 0:
+        return ln_agm(x)
+    return x.ln()
+
+
+def exp(x):
+    """Return ``e**x`` to current precision using ``exp_newton`` for high
+    precisions (see ``EXP_NEWTON_THRESHOLD``). Arguments too large for the
+    result to be representable are left to ``Decimal.exp``."""
+    if decimal.getcontext().prec >= EXP_NEWTON_THRESHOLD and x and \
+            x.is_finite() and x.adjusted() < 10:
+        return exp_newton(x)
+    return x.exp()
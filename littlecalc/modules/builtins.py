@@ -1,14 +1,40 @@
 import sys
-import traceback
+from littlecalc import tracing
 from littlecalc.core import Module, CalculatorError, ModuleLoadError, operation
 
 
+# Names registered before import by lazy loading, must match builtins.manifest
+# (see core.read_manifest).
+__manifest__ = {
+    'operations': [
+        'store', 'sto', 'recall', 'rcl', 'clear', 'clr', 'clearall', 'xchy',
+        'rolup', 'rlu', 'roldown', 'rld', 'push', 'pop', 'lastx', 'loadmod',
+        'unloadmod', 'cache?', 'cacheclear', 'cachelimit', 'stats', 'trace'
+    ],
+}
+
+
+_STATS_COMMANDS = ('on', 'off', 'reset')
+
+_CACHE_LIMITS = ('entries', 'bytes')
+
+
+def _stats_stream_args(words):
+    """Return the number of ``words`` pulled by ``stats``."""
+    return 1 if words and words[0] in _STATS_COMMANDS else 0
+
+
+def _trace_stream_args(words):
+    """Return the number of ``words`` pulled by ``trace``."""
+    return 2 if words and words[0] == 'dump' else 1
+
+
 class BuiltinsModule(Module):
 
     def __init__(self):
         super().__init__('builtins')
 
-    @operation('store', aliases=['sto'], type='plain')
+    @operation('store', aliases=['sto'], type='plain', stream_args=1)
     def store(calc, destination, value):
         calc.storage[destination] = value
     store.add('remote', pass_module=False)
@@ -23,7 +49,7 @@ class BuiltinsModule(Module):
 
         self.store(calc, destination, value)
 
-    @operation('recall', aliases=['rcl'], type='plain')
+    @operation('recall', aliases=['rcl'], type='plain', stream_args=1)
     def recall(calc, source):
         value = calc.storage[source]
         calc.stack.push(value)
@@ -93,7 +119,7 @@ class BuiltinsModule(Module):
             calc.stack.push(calc.stack.lastx)
     lastx.add('remote', from_type='calc')
 
-    @operation('loadmod', type='calc')
+    @operation('loadmod', type='calc', stream_args=1)
     def loadmod(self, calc):
         if calc.input_stream.has_next():
             module_name = calc.input_stream.pop()
@@ -103,11 +129,12 @@ class BuiltinsModule(Module):
         try:
             calc.load_module_by_name(module_name)
         except ModuleLoadError as err:
+            import traceback
             calc.output(
                 'An error occurred loading module {!r}'.format(module_name))
             calc.output(traceback.format_exc())
 
-    @operation('unloadmod', type='calc')
+    @operation('unloadmod', type='calc', stream_args=1)
     def unloadmod(self, calc):
         if calc.input_stream.has_next():
             module_name = calc.input_stream.pop()
@@ -115,6 +142,92 @@ class BuiltinsModule(Module):
             raise CalculatorError('argument missing')
         calc.unload_module_by_name(module_name)
 
+    @operation('cache?', type='calc')
+    def cache_show(self, calc):
+        """Show statistics of the cache of results of pure operations."""
+        calc.output(str(calc.result_cache))
+
+    @operation('cacheclear', type='calc')
+    def cache_clear(self, calc):
+        """Clear the cache of results of pure operations."""
+        calc.result_cache.clear()
+
+    @operation('cachelimit', type='calc', stream_args=2)
+    def cache_limit(self, calc):
+        """``cachelimit entries N`` and ``cachelimit bytes N`` change the
+        maximum number of entries and bytes of the cache of results of pure
+        operations, ``cachelimit entries 0`` disables it."""
+        if not calc.input_stream.has_next():
+            raise CalculatorError('argument missing: entries or bytes')
+        limit = calc.input_stream.pop()
+        if limit not in _CACHE_LIMITS:
+            raise CalculatorError('unknown cache limit {!r}'.format(limit))
+
+        if not calc.input_stream.has_next():
+            raise CalculatorError('argument missing: number of ' + limit)
+        try:
+            value = int(calc.input_stream.pop())
+        except ValueError:
+            raise CalculatorError('number of {} must be an integer'.format(
+                limit)) from None
+        if value < 0:
+            raise CalculatorError(
+                'number of {} must not be negative'.format(limit))
+
+        if limit == 'entries':
+            calc.result_cache.resize(max_entries=value)
+        else:
+            calc.result_cache.resize(max_bytes=value)
+
+    @operation('stats', type='calc', stream_args=_stats_stream_args)
+    def stats(self, calc):
+        """Show the time spent in every operation. ``stats on`` and
+        ``stats off`` enable and disable profiling, ``stats reset`` clears
+        the data collected so far."""
+        command = None
+        if calc.input_stream.has_next() and \
+                calc.input_stream.peek() in _STATS_COMMANDS:
+            command = calc.input_stream.pop()
+
+        if command == 'on':
+            calc.enable_profiling()
+        elif command == 'off':
+            calc.disable_profiling()
+        elif command == 'reset':
+            if calc.profile is not None:
+                calc.profile.reset()
+        elif calc.profile is None:
+            calc.output('profiling is disabled, enable it using "stats on"')
+        else:
+            calc.output(calc.profile.format_table())
+
+    @operation('trace', type='calc', stream_args=_trace_stream_args)
+    def trace(self, calc):
+        """``trace on`` and ``trace off`` start and stop recording an
+        execution trace, ``trace dump FILE`` writes it to FILE in the Chrome
+        trace-event format (see ``littlecalc.tracing``)."""
+        if calc.input_stream.has_next():
+            command = calc.input_stream.pop()
+        else:
+            raise CalculatorError('argument missing: on, off or dump')
+
+        if command == 'on':
+            calc.add_instrument(tracing.start())
+        elif command == 'off':
+            if tracing.tracer is not None:
+                calc.remove_instrument(tracing.tracer)
+            tracing.stop()
+        elif command == 'dump':
+            if calc.input_stream.has_next():
+                path = calc.input_stream.pop()
+            else:
+                raise CalculatorError('argument missing: file name')
+            count = tracing.dump(path)
+            calc.output('wrote {} spans to {}'.format(count, path))
+        else:
+            raise CalculatorError(
+                'unknown trace command {!r}'.format(command))
+
 
 def get_modules(calc):
     return [BuiltinsModule()]
@@ -14,11 +14,21 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from decimal import localcontext
-import traceback
+from collections import OrderedDict
+from decimal import getcontext
+from littlecalc import dmath, tracing
 from littlecalc.core import Module, CalculatorError, operation
 
 
+# Names registered before import by lazy loading, must match constants.manifest
+# (see core.read_manifest).
+__manifest__ = {
+    'operations': [
+        'const', 'const?'
+    ],
+}
+
+
 class ConstantError(CalculatorError):
     pass
 
@@ -35,9 +45,14 @@ class ConstantCalculationError(ConstantError):
 
 class ConstantsModule(Module):
 
-    def __init__(self):
+    def __init__(self, defaults=None):
         super().__init__('constants')
 
+        self.defaults = defaults
+        """A function adding default constants to this module. It is called
+        when constants are accessed for the first time, so the table of
+        constants is not built unless it is used."""
+
         self.descriptions = {}
         """Mapping a constant's id to a short description."""
 
@@ -50,6 +65,23 @@ class ConstantsModule(Module):
         """Mapping a constant's id to a function that can calculate
         the constant up to the current precision of the calculator."""
 
+        self.cache = OrderedDict()
+        """LRU cache mapping ``(constant id, precision, rounding)`` to
+        the constant's value."""
+
+        self.cache_size = 256
+        """Maximum number of entries in ``self.cache``."""
+
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        self.dependencies = {}
+        """Mapping a constant's id to the set of ids of all constants
+        requested while calculating it (e.g. ``'eps0'`` depends on
+        ``'mu0'`` and ``'c0'``)."""
+
+        self._calculating = []
+
     def get(self, calculator, constant_id):
         """Returns a numeric value for the requested constant. An
         ``UnknownConstantError`` is raised if an unknown constant
@@ -61,7 +93,39 @@ class ConstantsModule(Module):
 
         If there is a function available to calculate the requested
         constant, it will be used instead of a stored fixed value.
+
+        Values are cached per precision and rounding mode of the current
+        context. Constants requested while calculating another constant are
+        recorded in ``self.dependencies``, so redefining a constant
+        invalidates all cached constants depending on it.
         """
+        context = getcontext()
+        key = (constant_id, context.prec, context.rounding)
+
+        if self._calculating:
+            self.dependencies.setdefault(
+                self._calculating[-1], set()).add(constant_id)
+
+        try:
+            value = self.cache[key]
+        except KeyError:
+            self.cache_misses += 1
+        else:
+            self.cache_hits += 1
+            self.cache.move_to_end(key)
+            return value
+
+        with tracing.span('const {}', 'constant', {'precision': context.prec},
+                          name_args=(constant_id,)):
+            value = self._calculate(calculator, constant_id)
+
+        self.cache[key] = value
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return value
+
+    def _calculate(self, calculator, constant_id):
+        self._add_defaults()
         try:
             func = self.constant_calculators[constant_id]
         except KeyError:
@@ -71,17 +135,52 @@ class ConstantsModule(Module):
                 raise UnknownConstantError(constant_id)
             return calculator.to_numeric(value)
 
+        if constant_id in self._calculating:
+            raise ConstantCalculationError(
+                'Circular dependency of constant: "{}"'.format(constant_id))
+
+        self._calculating.append(constant_id)
         try:
             return func(calculator, self)
+        except ConstantError:
+            raise
         except Exception as err:
             raise ConstantCalculationError(
                 'Cannot calculate constant: "{}"'.format(constant_id)
             ) from err
+        finally:
+            self._calculating.pop()
+
+    def invalidate(self, constant_id):
+        """Remove cached values of ``constant_id`` and of all constants
+        depending on it."""
+        invalid = {constant_id}
+        changed = True
+        while changed:
+            changed = False
+            for dependent, dependencies in self.dependencies.items():
+                if dependent not in invalid and dependencies & invalid:
+                    invalid.add(dependent)
+                    changed = True
+
+        for key in [key for key in self.cache if key[0] in invalid]:
+            del self.cache[key]
+
+    def clear_cache(self):
+        self.cache.clear()
+        self.cache_hits = self.cache_misses = 0
+
+    def _add_defaults(self):
+        if self.defaults is not None:
+            defaults, self.defaults = self.defaults, None
+            defaults(self)
 
     def __contains__(self, item):
+        self._add_defaults()
         return item in self.descriptions
 
     def __iter__(self):
+        self._add_defaults()
         return iter(self.descriptions)
 
     def add(self, constant_id, description, value=None, func=None):
@@ -97,6 +196,7 @@ class ConstantsModule(Module):
         constant is requested to allow calculating the constant to the
         current calculator precision.
         """
+        self._add_defaults()
         if value is None and func is None:
             raise ValueError('value and func must not both be None')
         elif value is not None and func is not None:
@@ -105,10 +205,13 @@ class ConstantsModule(Module):
         self.descriptions[constant_id] = description
         if value is not None:
             self.fixed_constants[constant_id] = value
+            self.constant_calculators.pop(constant_id, None)
         else:
             self.constant_calculators[constant_id] = func
+        self.dependencies.pop(constant_id, None)
+        self.invalidate(constant_id)
 
-    @operation('const', type='plain')
+    @operation('const', type='plain', stream_args=1)
     def const(self, calc, constant_id):
         return self.get(calc, constant_id)
     const.add('remote', from_type='plain')
@@ -123,48 +226,29 @@ class ConstantsModule(Module):
         try:
             value = self.const(self, calc, constant_id)
         except ConstantError as err:
+            import traceback
             calc.output(traceback.format_exc())
         else:
             calc.stack.push(value)
 
+    @operation('const?', type='calc')
+    def const_show(self, calc):
+        """Show statistics of the constant cache."""
+        lookups = self.cache_hits + self.cache_misses
+        hit_rate = self.cache_hits / lookups if lookups else 0
+        calc.output(
+            'constant cache: {} of {} entries, {} hits, {} misses '
+            '(hit rate {:.1%})'.format(
+                len(self.cache), self.cache_size, self.cache_hits,
+                self.cache_misses, hit_rate))
+
 
 def calc_e(calc, module):
-    to_num = calc.to_numeric
-    with localcontext() as ctx:
-        ctx.prec += 5
-        i, fact, num = 0, 1, to_num('1.0')
-        lasts, s = to_num('0'), to_num('1.0')
-        while s != lasts:
-            lasts = s
-            i += 1
-            fact *= i
-            # num *= 1  # calculation of e^1
-            s += num / fact
-    return +s  # rounding back to original precision
+    return dmath.e()
 
 
 def calc_pi(calc, module):
-    to_num = calc.to_numeric
-    with localcontext() as ctx:
-        ctx.prec += 5  # increase precision for intermediate steps
-
-        const_0p5 = to_num('0.5')
-
-        # Gauss-Legendre algorithm
-        an, bn, tn, pn = to_num(1), 1 / to_num(2)**const_0p5, 1 / to_num(4), 1
-        v, lastv = 0, 1
-        while v != lastv:
-            a, b, t, p = an, bn, tn, pn
-
-            an = (a + b) / 2
-            bn = (a * b)**const_0p5
-            tn = t - p * (a - an)**2
-            pn = 2 * p
-
-            lastv = v
-            v = (an + bn)**2 / (4 * tn)
-
-    return +v  # round back to previous precision
+    return dmath.pi()
 
 
 def calc_phys_mu0(calc, module):
@@ -279,6 +363,4 @@ def add_default_constants(module):
 
 
 def get_modules(calc):
-    module = ConstantsModule()
-    add_default_constants(module)
-    return [module]
+    return [ConstantsModule(defaults=add_default_constants)]
@@ -17,56 +17,299 @@
 import functools
 
 import math
+import re
+import time
 import decimal
-from littlecalc.core import Module, NumericConverter, operation
+from littlecalc import dmath, tracing
+from littlecalc.core import (
+    CalculatorError, Module, NumericConverter, NOT_NUMERIC, operation)
+
+
+# Names registered before import by lazy loading, must match decimal.manifest
+# (see core.read_manifest).
+__manifest__ = {
+    'operations': [
+        'prec', 'prec?', 'add', '+', 'sub', '-', 'mul', '*', 'div', '/',
+        'inv', 'sqrt', 'sqr', '^2', 'exp', 'ln', 'log10', 'lg', 'pow', '**',
+        '^', 'root', 'log', 'log2', 'logb', 'abs', 'floor', 'ceil', 'min',
+        'max', 'sin', 'cos', 'sincos', 'tan', 'cot', 'arctan', 'arccot',
+        'arcsin', 'arccos', 'sinh', 'cosh', 'sinhcosh', 'tanh', 'coth',
+        'arcsinh', 'arccosh', 'arctanh', 'arccoth', 'retries?'
+    ],
+    'numeric_types': ['DecimalConverter'],
+}
+
+
+# Superset of the syntax accepted by ``decimal.Decimal``. Words not matching
+# this pattern (e.g. operation names) are rejected without raising and
+# catching ``decimal.InvalidOperation``.
+_NUMERIC_PATTERN = re.compile(
+    r'[+-]?(?:(?:\d[\d_]*(?:\.[\d_]*)?|\.\d[\d_]*)(?:e[+-]?\d[\d_]*)?'
+    r'|inf(?:inity)?|s?nan[\d_]*)$',
+    re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_word(word):
+    """
+    Convert ``word`` to a Decimal or return ``NOT_NUMERIC``. Results are
+    cached as the same literals (e.g. ``1``, ``2`` or ``0.5``) are used
+    over and over again. Converting a string to a Decimal is exact and
+    does not depend on the current context, so the word itself is a
+    sufficient cache key.
+    """
+    if _NUMERIC_PATTERN.match(word) is None:
+        return NOT_NUMERIC
+    try:
+        return decimal.Decimal(word)
+    except decimal.InvalidOperation:
+        return NOT_NUMERIC
 
 
 class DecimalConverter(NumericConverter):
 
     @classmethod
     def is_numeric(cls, word):
-        try:
-            cls.to_numeric(word)
-            return True
-        except decimal.InvalidOperation:
-            return False
+        return cls.try_parse(word) is not NOT_NUMERIC
 
     @classmethod
     def to_numeric(cls, word):
         return decimal.Decimal(word)
 
+    @classmethod
+    def try_parse(cls, word):
+        if isinstance(word, str):
+            return _parse_word(word)
+
+        try:
+            return cls.to_numeric(word)
+        except (decimal.InvalidOperation, TypeError, ValueError):
+            return NOT_NUMERIC
+
+
+ERROR_DIGITS = 2
+"""The helpers computing transcendental functions are accurate to within
+``10**ERROR_DIGITS`` units in the last place of the precision they are
+evaluated with."""
+
+GUARD_DIGITS = ERROR_DIGITS + 3
+"""Additional digits used for the first evaluation of a function decorated
+with ``adaptive_precision``. About one in ``10**(GUARD_DIGITS -
+ERROR_DIGITS) / 2`` evaluations needs to be retried."""
+
+MAX_RETRIES = 6
+
 
-def increase_precision(add=5, mul=1):
+class RetryStats:
+    """Counts evaluations and retries of a function decorated with
+    ``adaptive_precision``."""
+
+    def __init__(self):
+        self.calls = 0
+        self.retries = 0
+
+    def __str__(self):
+        rate = self.retries / self.calls if self.calls else 0
+        return '{} calls, {} retries ({:.2%})'.format(
+            self.calls, self.retries, rate)
+
+
+RETRY_STATS = {}
+"""Mapping names of functions decorated with ``adaptive_precision`` to their
+``RetryStats``."""
+
+
+def _round_correctly(value, context):
     """
-    Increase decimal precision before calculation and round result back to
-    original precision. This function returns a decorating function.
+    Return ``value`` (computed with current precision) rounded using
+    ``context`` if all values within the error bound (see
+    ``ERROR_DIGITS``) round to the same result. Otherwise return None.
 
-    In the following examlpe::
+    If ``value`` is this result (e.g. an exact result like ``cosh(0)``), it
+    is returned with its own exponent, so it is not padded with zeros.
+    """
+    if not value or not value.is_finite():
+        return context.plus(value)
+
+    with decimal.localcontext() as ctx:
+        error = decimal.Decimal(
+            (0, (1,), value.adjusted() - ctx.prec + 1 + ERROR_DIGITS))
+        ctx.prec += ERROR_DIGITS + 2  # compute interval exactly
+        low = context.plus(value - error)
+        high = context.plus(value + error)
+    if low != high:
+        return None
+    return context.plus(value) if low == value else low
 
-        @increase_precision(add=10)
-        def sin(x):
-            # ... calculate result ...
-            return result
 
-    ``result`` is calculated with an additional precision of 10 digits. But
-    before this result is passed to the caller, it is rounded back to original
-    precision.
+def adaptive_precision(func):
+    """
+    Decorator computing the result of ``func`` correctly rounded to current
+    precision (Ziv's strategy). ``func`` returns a Decimal or a tuple of
+    Decimals.
+
+    ``func`` is evaluated with ``GUARD_DIGITS`` additional digits. As its
+    error is bounded by ``10**ERROR_DIGITS`` units in the last place, the
+    result is rounded correctly if rounding both ends of this error interval
+    gives the same value. Only if the result is too close to a rounding
+    boundary, ``func`` is evaluated again with twice as many additional
+    digits. After ``MAX_RETRIES`` retries (e.g. for exact results in
+    directed rounding modes) the last result is rounded.
+
+    While tracing (see ``littlecalc.tracing``), every evaluation is recorded
+    as a span along with the number of retries.
     """
-    def decorating_function(func):
+    name = func.__name__.lstrip('_')
+    stats = RETRY_STATS.setdefault(name, RetryStats())
 
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs):
+    @functools.wraps(func)
+    def wrapper(*args):
+        tracer = tracing.tracer
+        if tracer is None:
+            return evaluate(*args)
+
+        retries = stats.retries
+        start = time.perf_counter()
+        try:
+            return evaluate(*args)
+        finally:
+            tracer.add(name, 'precision', start, time.perf_counter(), {
+                'precision': decimal.getcontext().prec,
+                'retries': stats.retries - retries,
+            })
+
+    def evaluate(*args):
+        context = decimal.getcontext()
+        stats.calls += 1
+
+        guard = GUARD_DIGITS
+        for _ in range(MAX_RETRIES):
             with decimal.localcontext() as ctx:
-                ctx.prec *= mul
-                ctx.prec += add  # increase precision for intermediate steps
+                ctx.prec = context.prec + guard
+                ctx.rounding = decimal.ROUND_HALF_EVEN  # see ERROR_DIGITS
+                result = func(*args)
+                if isinstance(result, tuple):
+                    rounded = tuple(_round_correctly(value, context)
+                                    for value in result)
+                    if None not in rounded:
+                        return rounded
+                else:
+                    rounded = _round_correctly(result, context)
+                    if rounded is not None:
+                        return rounded
+
+            stats.retries += 1
+            guard *= 2
+
+        if isinstance(result, tuple):
+            return tuple(map(context.plus, result))
+        return context.plus(result)
+
+    return wrapper
+
+
+FAST_PATH_MAX_PREC = 14
+"""Precisions up to which functions decorated with ``float_fast_path`` are
+computed using binary floats first. Floats have almost 16 significant
+decimal digits, but the closer the precision gets to that, the more often a
+float result is too close to a rounding boundary and the slow path has to
+be used anyway (about 7% of all cases for 14 digits)."""
+
+FLOAT_ERROR_ULPS = 2
+"""Assumed error of the ``math`` functions in units in the last place."""
+
+
+class FastPathStats:
+    """Counts calls of a function decorated with ``float_fast_path`` and how
+    many of them were answered using floats."""
+
+    def __init__(self):
+        self.calls = 0
+        self.hits = 0
+
+    def __str__(self):
+        rate = self.hits / self.calls if self.calls else 0
+        return '{} calls, {} float results ({:.2%})'.format(
+            self.calls, self.hits, rate)
+
+
+FAST_PATH_STATS = {}
+"""Mapping names of functions decorated with ``float_fast_path`` to their
+``FastPathStats``."""
+
+
+def _ulp(x):
+    """Return the unit in the last place of the float ``x`` (like
+    ``math.ulp``, which requires Python 3.9)."""
+    if not x:
+        return math.ldexp(1.0, -1074)  # smallest subnormal
+    _, exponent = math.frexp(x)
+    return math.ldexp(1.0, max(exponent - 53, -1074))
+
+
+def _float_result(float_func, derivative, x, context):
+    """
+    Return ``float_func(x)`` rounded using ``context`` if the result is
+    known to be rounded correctly, otherwise None.
 
-                result = func(*args, **kwargs)
+    The error bound consists of the error of the ``math`` function (see
+    ``FLOAT_ERROR_ULPS``) and the error caused by converting ``x`` to a
+    float, which is propagated using ``derivative(x, y)``, a bound of
+    ``|f'(x)|`` near ``x`` given ``y = f(x)``.
+    """
+    if not x.is_finite():
+        return None
+    try:
+        x_float = float(x)
+        y = float_func(x_float)
+    except (OverflowError, ValueError):
+        return None
+    if not y or not math.isfinite(y):
+        return None
+
+    # One more ulp covers the rounding of y - error and y + error.
+    error = (FLOAT_ERROR_ULPS + 1) * _ulp(y)
+    if decimal.Decimal(x_float) != x:
+        error += derivative(x_float, y) * _ulp(x_float)
+
+    low = context.plus(decimal.Decimal(y - error))
+    high = context.plus(decimal.Decimal(y + error))
+    # round y itself to keep exact results like exp(0) = 1 short
+    return context.plus(decimal.Decimal(y)) if low == high else None
+
+
+def float_fast_path(float_func, derivative, rounding=None):
+    """
+    Decorator for functions of one Decimal computing them using
+    ``float_func`` (from the ``math`` module) if the precision is at most
+    ``FAST_PATH_MAX_PREC`` and the float result can be rounded correctly
+    (see ``_float_result``). Otherwise the decorated function is called.
+
+    If ``rounding`` is not None, the float result is rounded using this
+    rounding mode instead of the context's (like ``Decimal.ln``, which
+    always rounds half even).
+    """
+    def decorator(func):
+        stats = FAST_PATH_STATS.setdefault(
+            func.__name__.lstrip('_'), FastPathStats())
 
-            return +result  # round back to previous precision
+        @functools.wraps(func)
+        def wrapper(x):
+            context = decimal.getcontext()
+            if context.prec <= FAST_PATH_MAX_PREC:
+                stats.calls += 1
+                if rounding is not None and context.rounding != rounding:
+                    context = context.copy()
+                    context.rounding = rounding
+                result = _float_result(float_func, derivative, x, context)
+                if result is not None:
+                    stats.hits += 1
+                    return result
+            return func(x)
 
         return wrapper
 
-    return decorating_function
+    return decorator
 
 
 class DecimalModule(Module):
@@ -74,17 +317,40 @@ class DecimalModule(Module):
     def __init__(self):
         super().__init__('decimal')
 
+        self.context = None
+        """The ``decimal.Context`` owned by the calculator loading this
+        module (initialized from ``decimal.DefaultContext``). It is
+        installed as current context while the calculator evaluates, so
+        all helpers use its precision via ``decimal.getcontext()``."""
+
     def load_module(self, calc):
         super().load_module(calc)
 
+        self.context = decimal.Context()
         self.calc.register_numeric_type(DecimalConverter)
+        self.calc.register_activator(self._enter_context, self._exit_context)
+        self.calc.register_context_key(self._context_key)
 
     def unload_module(self):
+        self.calc.deregister_context_key(self._context_key)
+        self.calc.deregister_activator(self._enter_context, self._exit_context)
         self.calc.deregister_numeric_type(DecimalConverter)
 
         super().unload_module()
 
-    @operation('prec', type='calc')
+    def _enter_context(self):
+        previous = decimal.getcontext()
+        decimal.setcontext(self.context)
+        return previous
+
+    def _exit_context(self, previous):
+        decimal.setcontext(previous)
+
+    def _context_key(self):
+        context = self.context
+        return context.prec, context.rounding, context.Emin, context.Emax
+
+    @operation('prec', type='calc', stream_args=1)
     def prec(self, calc):
         if calc.input_stream.has_next():
             try:
@@ -94,12 +360,11 @@ class DecimalModule(Module):
                 # TODO: raise error
                 return
 
-        context = decimal.getcontext()
-        context.prec = new_prec
+        self.context.prec = new_prec
 
     @operation('prec?', type='calc')
     def prec_show(self, calc):
-        calc.output('current precision: {}'.format(decimal.getcontext().prec))
+        calc.output('current precision: {}'.format(self.context.prec))
 
     # basic mathematical operations
 
@@ -123,7 +388,7 @@ class DecimalModule(Module):
     def inv(x):
         return 1 / x
 
-    @operation('sqrt', type='stack', arg_count=1, add_plain=True)
+    @operation('sqrt', type='stack', arg_count=1, add_plain=True, pure=True)
     def sqrt(x):
         return x.sqrt()
 
@@ -132,33 +397,47 @@ class DecimalModule(Module):
     def sqr(x):
         return x * x
 
-    @operation('exp', type='stack', arg_count=1, add_plain=True)
+    @operation('exp', type='stack', arg_count=1, add_plain=True, pure=True)
     def exp(x):
-        return x.exp()
+        return _exp(x)
 
-    @operation('ln', type='stack', arg_count=1, add_plain=True)
+    @operation('ln', type='stack', arg_count=1, add_plain=True, pure=True)
     def ln(x):
-        return x.ln()
+        return _ln(x)
 
     @operation('log10', aliases=['lg'], type='stack', arg_count=1,
-               add_plain=True)
+               add_plain=True, pure=True)
     def log10(x):
-        return x.log10()
+        return _log10(x)
 
     @operation('pow', aliases=['**', '^'], type='stack', arg_count=2,
-               add_plain=True)
+               add_plain=True, pure=True)
     def power(x, y):
-        return y ** x
+        return _power(y, x)
 
-    @operation('root', type='stack', arg_count=2, add_plain=True)
+    @operation('root', type='stack', arg_count=2, add_plain=True, pure=True)
     def root(x, y):
         """Xth root of Y."""
-        return y ** (1 / x)
+        return _power(y, 1 / x)
 
-    @operation('log', type='stack', arg_count=2, add_plain=True)
-    @increase_precision(5)
+    @operation('log', type='stack', arg_count=2, add_plain=True, pure=True)
     def log(x, y):
-        return y.log10() / x.log10()  # log_x(y)
+        return _log(y, x)  # log_x(y)
+
+    @operation('log2', type='stack', arg_count=1, add_plain=True, pure=True)
+    def log2(x):
+        return _log2(x)
+
+    @operation('logb', type='calc', stream_args=1)
+    def logb(self, calc):
+        """Logarithm of X to the base given as next word, e.g.
+        ``8 logb 2``."""
+        if calc.input_stream.has_next():
+            base = calc.to_numeric(calc.input_stream.pop())
+        else:
+            raise CalculatorError('argument missing: base')
+        x = calc.stack.pop()
+        calc.stack.push(_log(x, base))
 
     @operation('abs', type='stack', arg_count=1, add_plain=True)
     def abs(x):
@@ -182,299 +461,689 @@ class DecimalModule(Module):
 
     # trigonometric functions
 
-    @operation('sin', type='stack', arg_count=1, add_plain=True)
+    @operation('sin', type='stack', arg_count=1, add_plain=True, pure=True)
     def sin(x):
         return _sin(x)
 
-    @operation('cos', type='stack', arg_count=1, add_plain=True)
+    @operation('cos', type='stack', arg_count=1, add_plain=True, pure=True)
     def cos(x):
         return _cos(x)
 
-    @operation('tan', type='stack', arg_count=1, add_plain=True)
+    @operation('sincos', type='stack', arg_count=1, push_multiple=True,
+               add_plain=True, pure=True)
+    def sincos(x):
+        """Push sin(x) and then cos(x)."""
+        return _sincos(x)
+
+    @operation('tan', type='stack', arg_count=1, add_plain=True, pure=True)
     def tan(x):
         return _tan(x)
 
-    @operation('cot', type='stack', arg_count=1, add_plain=True)
+    @operation('cot', type='stack', arg_count=1, add_plain=True, pure=True)
     def cot(x):
         return _cot(x)
 
-    @operation('arctan', type='stack', arg_count=1, add_plain=True)
+    @operation('arctan', type='stack', arg_count=1, add_plain=True, pure=True)
     def arctan(x):
         return _arctan(x)
 
-    @operation('arccot', type='stack', arg_count=1, add_plain=True)
+    @operation('arccot', type='stack', arg_count=1, add_plain=True, pure=True)
     def arccot(x):
         return _arccot(x)
 
-    @operation('arcsin', type='stack', arg_count=1, add_plain=True)
+    @operation('arcsin', type='stack', arg_count=1, add_plain=True, pure=True)
     def arcsin(x):
         return _arcsin(x)
 
-    @operation('arccos', type='stack', arg_count=1, add_plain=True)
+    @operation('arccos', type='stack', arg_count=1, add_plain=True, pure=True)
     def arccos(x):
         return _arccos(x)
 
-    @operation('sinh', type='stack', arg_count=1, add_plain=True)
+    @operation('sinh', type='stack', arg_count=1, add_plain=True, pure=True)
     def sinh(x):
-        return (x.exp() - (-x).exp()) / 2
+        return _sinh(x)
 
-    @operation('cosh', type='stack', arg_count=1, add_plain=True)
+    @operation('cosh', type='stack', arg_count=1, add_plain=True, pure=True)
     def cosh(x):
-        return (x.exp() + (-x).exp()) / 2
+        return _cosh(x)
 
-    @operation('tanh', type='stack', arg_count=1, add_plain=True)
-    @increase_precision(5)
+    @operation('sinhcosh', type='stack', arg_count=1, push_multiple=True,
+               add_plain=True, pure=True)
+    def sinhcosh(x):
+        """Push sinh(x) and then cosh(x)."""
+        return _sinhcosh(x)
+
+    @operation('tanh', type='stack', arg_count=1, add_plain=True, pure=True)
     def tanh(x):
-        return DecimalModule.sinh(x) / DecimalModule.cosh(x)
+        return _tanh(x)
 
-    @operation('coth', type='stack', arg_count=1, add_plain=True)
-    @increase_precision(5)
+    @operation('coth', type='stack', arg_count=1, add_plain=True, pure=True)
     def coth(x):
-        return DecimalModule.cosh(x) / DecimalModule.sinh(x)
+        return _coth(x)
 
-    @operation('arcsinh', type='stack', arg_count=1, add_plain=True)
-    @increase_precision(5)
+    @operation('arcsinh', type='stack', arg_count=1, add_plain=True, pure=True)
     def arcsinh(x):
-        return (x + DecimalModule.sqrt(x**2 + 1)).ln()
+        return _arcsinh(x)
 
-    @operation('arccosh', type='stack', arg_count=1, add_plain=True)
-    @increase_precision(5)
+    @operation('arccosh', type='stack', arg_count=1, add_plain=True, pure=True)
     def arccosh(x):
-        return (x + DecimalModule.sqrt(x**2 - 1)).ln()
+        return _arccosh(x)
 
-    @operation('arctanh', type='stack', arg_count=1, add_plain=True)
-    @increase_precision(5)
+    @operation('arctanh', type='stack', arg_count=1, add_plain=True, pure=True)
     def arctanh(x):
-        return ((1 + x) / (1 - x)).ln() / 2
+        return _arctanh(x)
 
-    @operation('arccoth', type='stack', arg_count=1, add_plain=True)
-    @increase_precision(5)
+    @operation('arccoth', type='stack', arg_count=1, add_plain=True, pure=True)
     def arccoth(x):
-        return ((x + 1) / (x - 1)).ln() / 2
+        return _arccoth(x)
 
+    @operation('retries?', type='calc')
+    def retries_show(self, calc):
+        """Show how often functions had to be evaluated again with a higher
+        precision, see ``adaptive_precision``."""
+        for name, stats in sorted(RETRY_STATS.items()):
+            if stats.calls:
+                calc.output('{}: {}'.format(name, stats))
 
-def compute_to_precision(init_factor, step_factor):
-    """
-    Returns a decorator which helps to compute a function's result to
-    current precision. It increases the calculation precision by a factor
-    ``step_factor`` until two consecutive calculations return the same result
-    (that is rounded to the externally defined current precision).
 
-    Before the first calculation starts, the calculation precision is
-    multiplied by ``init_factor`` and rounded up, all following increases of
-    the precision use ``init_factor``. ``init_factor`` must be greater
-    than 0 and ``init_factor`` must be greater than 1.
-    """
-    if init_factor <= 0:
-        raise ValueError('init_factor must be greater than 0')
-    if step_factor < 1:
-        raise ValueError('step_factor must be greater than 1')
+REDUCTION_GUARD_DIGITS = 5
+"""Digits of pi used for argument reduction in addition to the precision
+and the number of digits before the decimal point of the argument."""
 
-    def decorator(func):
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs):
-            # this ensures that the loop runs at least two times
-            result = None
-            last_result = None
+TRIPLING_FACTOR = 0.6
+"""The sine series is evaluated at ``r / 3**k`` with ``k`` about
+``TRIPLING_FACTOR * sqrt(prec)`` (for ``|r| ~ 1``), which was found to be
+fastest for precisions from 28 to 1000 digits."""
 
-            current_prec = decimal.getcontext().prec
-            # additional precision for intermediate steps
-            # and ensure that ensure that the initial precision is at least 1
-            next_prec = math.ceil(max(current_prec, 1) * init_factor)
+_LOG10_3 = math.log10(3)
+_PI_4_LOWER_BOUND = decimal.Decimal('0.785')
 
-            while last_result is None or result != last_result:
-                last_result = result
-                with decimal.localcontext() as ctx:
-                    ctx.prec = next_prec
 
-                    # calculate the actual result
-                    result = func(*args, **kwargs)
+def _reduce_half_pi(x):
+    """
+    Return ``(r, quadrant)`` such that ``x = r + (quadrant + 4n) * pi/2``
+    with ``|r| <= pi/4`` and ``0 <= quadrant < 4``.
 
-                    next_prec = math.ceil(next_prec * step_factor)
+    pi is computed with as many additional digits as ``x`` has digits before
+    its decimal point, so ``r`` is accurate even for huge ``x``. If ``x`` is
+    close to a multiple of pi/2, the reduction is repeated with as many
+    additional digits as were lost by cancellation.
+    """
+    if abs(x) < _PI_4_LOWER_BOUND:
+        return x, 0
+
+    context = decimal.getcontext()
+    extra = max(x.adjusted(), 0) + REDUCTION_GUARD_DIGITS
+    while True:
+        with decimal.localcontext() as ctx:
+            ctx.prec += extra
+            half_pi = dmath.pi() / 2
+            n = (x / half_pi).to_integral_value()
+            r = x - n * half_pi
+            quadrant = int(n % 4) % 4  # Decimal % keeps the sign of n
+
+        needed = max(x.adjusted(), 0) + max(-r.adjusted(), 0) + \
+            REDUCTION_GUARD_DIGITS
+        if extra >= needed:
+            return context.plus(r), quadrant
+        extra = needed
+
+
+FIXED_POINT_MIN_PREC = 100
+"""Precision from which on series are summed in fixed-point arithmetic
+using ints (see ``dmath.to_fixed``) instead of Decimals. For lower
+precisions converting to and from fixed-point costs more than it saves."""
+
+
+def _sin_series(x):
+    r"""
+    Calculate ``sin(x)`` for small ``x`` using the Taylor series:
+        \sin(x) =
+            \sum_{n=0}^{\infinity} (-1)^n \frac{ x^{2n + 1} }{ (2n + 1)! }
 
-                result = +result  # round back to previous precision
-            return result
+    The number of terms is determined in advance, such that the first
+    omitted term is smaller than ``x`` by the current precision.
+    """
+    if not x:
+        return x
+
+    prec = decimal.getcontext().prec
+    log_x = x.adjusted() + 1  # upper bound of log10(|x|)
+    terms, log_term = 0, 0.0
+    while log_term > -prec:
+        terms += 1
+        log_term += 2 * log_x - math.log10(2 * terms * (2 * terms + 1))
+
+    if prec >= FIXED_POINT_MIN_PREC:
+        return _sin_series_fixed(x, terms)
+    return _sin_series_decimal(x, terms)
+
+
+def _sin_series_decimal(x, terms):
+    x2 = x * x
+    s = term = x
+    for n in range(1, terms + 1):
+        term = term * x2 / -(2 * n * (2 * n + 1))
+        s += term
+    return s
 
-        return wrapper
-    return decorator
 
+def _sin_series_fixed(x, terms):
+    # scaled relative to x, as the result is about as small as x
+    bits = dmath.fixed_point_bits(
+        decimal.getcontext().prec - x.adjusted())
+    x_fixed = dmath.to_fixed(abs(x), bits)
+    x2 = x_fixed * x_fixed >> bits
 
-def _calc_pi(cache={}):
-    current_context = decimal.getcontext()
-    if current_context.prec in cache:
-        return cache[current_context.prec]
+    s = term = x_fixed
+    for n in range(1, terms + 1):
+        term = (term * x2 >> bits) // (2 * n * (2 * n + 1))
+        if n % 2:
+            s -= term
+        else:
+            s += term
 
-    D = decimal.Decimal
-    with decimal.localcontext() as ctx:
-        ctx.prec += 5  # increase precision for intermediate steps
+    s = dmath.from_fixed(s, bits)
+    return -s if x < 0 else s
 
-        const_0p5 = D('0.5')
 
-        # Gauss-Legendre algorithm
-        an, bn, tn, pn = D(1), 1 / D(2)**const_0p5, 1 / D(4), 1
-        v, lastv = 0, 1
-        while v != lastv:
-            a, b, t, p = an, bn, tn, pn
+def _sin_reduced(x):
+    r"""
+    Calculate ``sin(x)`` for ``|x| <= pi/4``. The series is evaluated at
+    ``x / 3**k`` and the result is tripled ``k`` times using:
+        \sin(3x) = 3 \sin(x) - 4 \sin^3(x)
+    """
+    if not x:
+        return x
 
-            an = (a + b) / 2
-            bn = (a * b)**const_0p5
-            tn = t - p * (a - an)**2
-            pn = 2 * p
+    prec = decimal.getcontext().prec
+    triplings = max(0, int(TRIPLING_FACTOR * math.sqrt(prec)
+                           + (x.adjusted() + 1) / _LOG10_3))
 
-            lastv = v
-            v = (an + bn)**2 / (4 * tn)
-    v = +v  # round back to previous precision
+    s = _sin_series(x / 3**triplings)
+    for _ in range(triplings):
+        s = s * (3 - 4 * s * s)
+    return s
 
-    cache[current_context.prec] = v
-    return v
 
+def _cos_reduced(x):
+    r"""
+    Calculate ``cos(x)`` for ``|x| <= pi/4`` using:
+        \cos(x) = 1 - 2 \sin^2 \frac{ x }{ 2 }
+    """
+    s = _sin_reduced(x / 2)
+    return 1 - 2 * s * s
 
-@increase_precision(5)
+
+@float_fast_path(math.sin, lambda x, y: 1)
+@adaptive_precision
 def _sin(x):
     """
-    Calculate ``sin(x)`` using the Taylor series:
-        \sin(x) =
-            \sum_{n=0}^{\infinity} (-1)^n \frac{ x^{2n + 1} }{ (2n + 1)! }
+    Calculate ``sin(x)``. ``x`` is reduced to ``|r| <= pi/4`` (see
+    ``_reduce_half_pi``) and the result is ``sin(r)`` or ``cos(r)`` with the
+    sign depending on the quadrant.
     """
+    r, quadrant = _reduce_half_pi(x)
+    result = _sin_reduced(r) if quadrant % 2 == 0 else _cos_reduced(r)
+    return -result if quadrant >= 2 else result
 
-    pi = _calc_pi()
-    x = x % (2 * pi)  # cos works best for small x
-
-    s, lasts = x, 0
-    i, num, fac, sign = 1, x, 1, 1
-
-    while s != lasts:
-        lasts = s
-
-        i += 2
-        fac *= i * (i - 1)
-        num *= x * x
-        sign *= -1
 
-        s += num / fac * sign
-    return s
-
-
-@increase_precision(5)
+@float_fast_path(math.cos, lambda x, y: 1)
+@adaptive_precision
 def _cos(x):
     """
-    Calculate ``cos(x)`` using the Taylor series:
-        \cos(x) = \sum_{n=0}^{\infinity} (-1)^n \frac{ x^{2n} }{ (2n)! }
+    Calculate ``cos(x)``. ``x`` is reduced to ``|r| <= pi/4`` (see
+    ``_reduce_half_pi``) and the result is ``cos(r)`` or ``sin(r)`` with the
+    sign depending on the quadrant.
     """
+    r, quadrant = _reduce_half_pi(x)
+    result = _cos_reduced(r) if quadrant % 2 == 0 else _sin_reduced(r)
+    return -result if quadrant in (1, 2) else result
 
-    pi = _calc_pi()
-    x = x % (2 * pi)  # cos works best for small x
 
-    s, lasts = 1, 0
-    i, num, fac, sign = 0, 1, 1, 1
+def _sincos_reduced(x):
+    r"""
+    Calculate ``(sin(x), cos(x))`` for ``|x| <= pi/4`` using one series
+    (see ``_sin_reduced``) and:
+        \cos(x) = \sqrt{ 1 - \sin^2(x) }
+    """
+    s = _sin_reduced(x)
+    return s, (1 - s * s).sqrt()
 
-    while s != lasts:
-        lasts = s
 
-        i += 2
-        fac *= i * (i - 1)
-        num *= x * x
-        sign *= -1
+def _sincos_kernel(x):
+    """Calculate ``(sin(x), cos(x))`` from a single argument reduction."""
+    r, quadrant = _reduce_half_pi(x)
+    s, c = _sincos_reduced(r)
+    return ((s, c), (c, -s), (-s, -c), (-c, s))[quadrant]
 
-        s += num / fac * sign
-    return s
+
+@adaptive_precision
+def _sincos(x):
+    """
+    Calculate ``(sin(x), cos(x))``, see ``_sincos_kernel``.
+    """
+    return _sincos_kernel(x)
 
 
-# @compute_to_precision(1, 1.1)
-@increase_precision(add=0, mul=2)
+@adaptive_precision
 def _tan(x):
-    """
+    r"""
     Calculate ``tan(x)`` using:
         \tan(x) = \frac{ \sin(x) }{ \cos(x) }
     """
-    return _sin(x) / _cos(x)
+    s, c = _sincos_kernel(x)
+    return s / c
 
 
-# @compute_to_precision(1, 1.1)
-@increase_precision(add=0, mul=2)
+@adaptive_precision
 def _cot(x):
-    """
+    r"""
     Calculate ``cot(x)`` using:
         \cot(x) = \frac{ \cos(x) }{ \sin(x) }
     """
-    return _cos(x) / _sin(x)
+    s, c = _sincos_kernel(x)
+    return c / s
 
 
-@increase_precision(5)
-def _arctan(x):
-    """
-    Calculate ``arctan(x)`` using:
+ARCTAN_GUARD_DIGITS = 2
+"""Additional digits compensating the rounding errors of the halvings in
+``_arctan_kernel``, one more digit is added per digit of ``d`` as the
+number of halvings grows with ``d``."""
+
+ARCTAN_HALVING_COST = 10
+"""Cost of one halving in ``_arctan_kernel`` (a square root and a
+division) in series terms, which determines how far arguments are
+reduced."""
+
+ARCTAN_SHORT_TERM_DIGITS = 27
+"""Number of digits of ``x`` for which a term of ``_arctan_series_short``
+costs twice as much as for an ``x`` of a single digit."""
+
+
+def _arctan_kernel(x):
+    r"""
+    Calculate ``arctan(x)`` for any ``x``. The argument is reduced using:
+        \arctan(x) = 2 \arctan \frac{ x }{ 1 + \sqrt{ 1 + x^2 } }
+    until ``|x| < 10^{-d}``. Then the series
         \arctan(x) = \sum_{k=0}^{\infinity} (-1)^k \frac{ x^{2k+1} }{ 2k + 1 }
+    is summed. The number of terms is determined in advance.
+
+    A halving saves about ``log10(2) prec / (2 d^2)`` terms, so it pays off
+    while this exceeds ``ARCTAN_HALVING_COST``, which gives
+    ``d = \sqrt{ log10(2) prec / (2 ARCTAN_HALVING_COST) }``.
 
-    This series converges for |x| < 1, to support |x| >= 1 the following is
-    used:
-        \arctan(x) = 2 \arctan \frac{ x }{ x + \sqrt{ 1 + x^2 } }
+    Arguments ``|x| <= 1/2`` with few digits are not reduced at all if
+    ``_arctan_series_short`` is estimated to be cheaper (see
+    ``_arctan_short_cost``).
+
+    ``arctan(\pm\infinity) = \pm \frac{ \pi }{ 2 }``, NaN raises
+    ``decimal.InvalidOperation``.
     """
-    if abs(x) >= 0.9:  # improve convergence for |x| ~ 1
-        _0p5 = x / x / 2
-        x = x / (1 + (1 + x**2)**_0p5)
-        s = 2 * _arctan(x)
-    else:
-        s = x
-        lasts = 0
-        num = x
-        sign = 1
-        k = 0
+    context = decimal.getcontext()
+    if x.is_nan():
+        raise decimal.InvalidOperation('arctan of NaN')
+    if x.is_infinite():
+        half_pi = context.plus(dmath.pi() / 2)
+        return half_pi.copy_sign(x)
+    if not x:
+        return context.plus(x)
+
+    if abs(x) <= 0.5 and _arctan_short_cost(x, context.prec) <= \
+            _arctan_reduction_cost(context.prec):
+        with decimal.localcontext() as ctx:
+            ctx.prec += ARCTAN_GUARD_DIGITS
+            s = _arctan_series_short(x)
+        return context.plus(s)
+
+    d = max(2, round(math.sqrt(
+        math.log10(2) * context.prec / (2 * ARCTAN_HALVING_COST))))
+
+    with decimal.localcontext() as ctx:
+        ctx.prec += ARCTAN_GUARD_DIGITS + len(str(d))
 
-        while s != lasts:
-            lasts = s
-            k += 1
+        halvings = 0
+        while x.adjusted() >= -d:
+            x = x / (1 + dmath.sqrt(1 + x * x))
+            halvings += 1
 
-            sign *= -1
-            num *= x * x
+        terms = ctx.prec // (-2 * (x.adjusted() + 1)) + 1
+        if ctx.prec >= FIXED_POINT_MIN_PREC:
+            s = _arctan_series_fixed(x, terms)
+        else:
+            s = _arctan_series_decimal(x, terms)
 
-            s += sign * num / (2 * k + 1)
+        s *= 2**halvings
+    return context.plus(s)
 
-    return +s
 
+def _arctan_short_cost(x, prec):
+    """Estimate the cost of ``_arctan_series_short(x)`` for ``0 < |x| <=
+    1/2`` in terms of a single digit ``x``."""
+    exponent = x.adjusted()
+    log_x = exponent + math.log10(abs(float(x.scaleb(-exponent))))
+    terms = prec / (-2 * log_x)
+    return terms * (1 + len(x.as_tuple().digits) / ARCTAN_SHORT_TERM_DIGITS)
 
-@increase_precision(5)
-def _arccot(x):
+
+def _arctan_reduction_cost(prec):
+    """Estimate the cost of reducing the argument and summing the series in
+    ``_arctan_kernel`` in the units of ``_arctan_short_cost`` (measured).
+    Full multiplications grow faster than linearly with ``prec``, below
+    ``FIXED_POINT_MIN_PREC`` the Decimal square roots dominate."""
+    if prec < FIXED_POINT_MIN_PREC:
+        return 2.5 * prec
+    return prec * math.log10(prec) / 2
+
+
+def _arctan_series_short(x):
     """
-    Calculate ``arccot(x)`` using:
-        \arccot(x) = \frac{ \pi }{ 2 } - \arctan(x)
+    Sum the arctan series for ``x`` with few digits in fixed-point
+    arithmetic. ``x^2`` is the fraction ``p^2 / q^2`` of small ints, so
+    every term costs a multiplication and a division by a small int only.
     """
-    pi = _calc_pi()
-    return pi / 2 - _arctan(x)
+    sign, digits, exponent = x.as_tuple()
+    p = int(''.join(map(str, digits)))
+    q = 10**-exponent  # exponent < 0 as 0 < |x| <= 1/2
+    p2, q2 = p * p, q * q
+
+    # scaled relative to x, as the result is about as small as x
+    bits = dmath.fixed_point_bits(
+        decimal.getcontext().prec - x.adjusted())
+    s = num = (p << bits) // q
+    k = 1
+    while num:
+        num = num * p2 // q2
+        if k % 2:
+            s -= num // (2 * k + 1)
+        else:
+            s += num // (2 * k + 1)
+        k += 1
+
+    s = dmath.from_fixed(s, bits)
+    return s.copy_negate() if sign else s
+
+
+def _arctan_series_decimal(x, terms):
+    x2 = x * x
+    s = num = x
+    for k in range(1, terms + 1):
+        num *= -x2
+        s += num / (2 * k + 1)
+    return s
 
 
-@increase_precision(5)
-def _arcsin(x):
+def _arctan_series_fixed(x, terms):
+    # scaled relative to x, as the result is about as small as x
+    bits = dmath.fixed_point_bits(
+        decimal.getcontext().prec - x.adjusted())
+    x_fixed = dmath.to_fixed(abs(x), bits)
+    x2 = x_fixed * x_fixed >> bits
+
+    s = num = x_fixed
+    for k in range(1, terms + 1):
+        num = num * x2 >> bits
+        if k % 2:
+            s -= num // (2 * k + 1)
+        else:
+            s += num // (2 * k + 1)
+
+    s = dmath.from_fixed(s, bits)
+    return -s if x < 0 else s
+
+
+@float_fast_path(math.atan, lambda x, y: 1 / (1 + x * x))
+@adaptive_precision
+def _arctan(x):
+    """
+    Calculate ``arctan(x)``, see ``_arctan_kernel``.
+    """
+    return _arctan_kernel(x)
+
+
+@adaptive_precision
+def _arccot(x):
+    r"""
+    Calculate ``arccot(x)`` in ``(0, pi)`` using:
+        \arccot(x) = \arctan \frac{ 1 }{ x }
+    for x > 0 and
+        \arccot(x) = \pi + \arctan \frac{ 1 }{ x }
+    for x < 0.
     """
+    if not x:
+        return dmath.pi() / 2
+    elif x > 0:
+        return _arctan_kernel(1 / x)
+    else:
+        return dmath.pi() + _arctan_kernel(1 / x)
+
+
+@adaptive_precision
+def _arcsin(x):
+    r"""
     Calculate ``arcsin(x)`` using:
-        \arcsin(x) = \sgn(x) \arctan \sqrt{ \frac{ x^2 }{ 1 - x^2 } }
+        \arcsin(x) = \arctan \frac{ x }{ \sqrt{ (1 - x) (1 + x) } }
     for |x| < 1 and
 
         \arcsin(|x| = 1) = \sgn(x) \frac{ \pi }{ 2 }
     for |x| = 1.
     """
-    sgn = -1 if x < 0 else 1
-    if x == 1:
-        pi = _calc_pi()
+    if abs(x) == 1:
+        return x * dmath.pi() / 2
+    return _arctan_kernel(x / ((1 - x) * (1 + x)).sqrt())
+
+
+@adaptive_precision
+def _arccos(x):
+    r"""
+    Calculate ``arccos(x)`` using:
+        \arccos(x) = 2 \arctan \sqrt{ \frac{ 1 - x }{ 1 + x } }
+    for x > -1 and
+        \arccos(-1) = \pi
+    """
+    if x == -1:
+        return dmath.pi()
+    return 2 * _arctan_kernel(((1 - x) / (1 + x)).sqrt())
+
+
+@float_fast_path(math.log, lambda x, y: 1 / x, decimal.ROUND_HALF_EVEN)
+def _ln(x):
+    if decimal.getcontext().prec >= dmath.LN_AGM_THRESHOLD:
+        return _ln_agm(x)
+    return x.ln()
+
+
+@adaptive_precision
+def _ln_agm(x):
+    return dmath.ln(x)
+
+
+def _log10(x):
+    if decimal.getcontext().prec < dmath.LN_AGM_THRESHOLD or \
+            not x.is_finite() or x <= 0 or \
+            x.normalize().as_tuple().digits == (1,):
+        return x.log10()  # exact for powers of ten
+    return _log10_agm(x)
 
-        result = sgn * pi / 2
+
+@adaptive_precision
+def _log10_agm(x):
+    return dmath.ln(x) / dmath.ln10()
+
+
+def _exact_log2(x):
+    """Return ``log2(x)`` if ``x`` is an integral power of two (up to
+    ``2**3321``), otherwise None."""
+    if abs(x.adjusted()) > 1000:  # do not build huge integers
+        return None
+    # like x.as_integer_ratio(), which requires Python 3.6
+    _, digits, exponent = x.as_tuple()
+    n = int(''.join(map(str, digits)))
+    if exponent >= 0:
+        n, d = n * 10**exponent, 1
     else:
-        _0p5 = x / x / 2
-        arg = (x**2 / (1 - x**2))**_0p5
+        d = 10**-exponent
+        divisor = math.gcd(n, d)
+        n, d = n // divisor, d // divisor
+    if d == 1 and n & (n - 1) == 0:
+        return decimal.Decimal(n.bit_length() - 1)
+    if n == 1 and d & (d - 1) == 0:
+        return decimal.Decimal(1 - d.bit_length())
+    return None
+
+
+def _log2(x):
+    # exact for powers of two, like Decimal.log10 for powers of ten
+    if x.is_finite() and x > 0:
+        result = _exact_log2(x)
+        if result is not None:
+            return result
+    return _log2_inexact(x)
 
-        result = sgn * _arctan(arg)
 
-    return result
+@adaptive_precision
+def _log2_inexact(x):
+    return dmath.ln(x) / dmath.ln2()
 
 
-@increase_precision(5)
-def _arccos(x):
+def _log(y, b):
     """
-    Calculate ``arccos(x)`` using:
-        \arccos(x) = \frac{ \pi }{ 2 } - \arcsin(x)
+    Calculate the logarithm of ``y`` to the base ``b``. ``ln(b)`` is
+    cached, see ``dmath.ln_base``.
+    """
+    if b == 2:
+        return _log2(y)
+    if b == 10:
+        return _log10(y)
+    return _log_cached_base(y, b)
+
+
+@adaptive_precision
+def _log_cached_base(y, b):
+    return dmath.ln(y) / dmath.ln_base(b)
+
+
+def _exp(x):
+    if decimal.getcontext().prec >= dmath.EXP_NEWTON_THRESHOLD:
+        return _exp_newton(x)
+    return x.exp()
+
+
+@adaptive_precision
+def _exp_newton(x):
+    return dmath.exp(x)
+
+
+def _power(y, x):
+    """
+    Calculate ``y ** x``. For high precisions and non-integral ``x`` this is
+    computed as ``exp(x ln(y))`` using the ``dmath`` backend.
+    """
+    if decimal.getcontext().prec < dmath.EXP_NEWTON_THRESHOLD or \
+            not (x.is_finite() and y.is_finite()) or y <= 0 or y == 1 or \
+            x == x.to_integral_value():
+        return y ** x
+    return _power_exp_ln(y, x)
+
+
+@adaptive_precision
+def _power_exp_ln(y, x):
+    with decimal.localcontext() as ctx:
+        # the absolute error of x ln(y) is the relative error of the result,
+        # ln(y) is bounded by 2.31 (|adjusted(y)| + 1)
+        magnitude = abs(x) * (abs(y.adjusted()) + 1) * 3
+        ctx.prec += max(magnitude.adjusted() + 1, 0)
+        return dmath.exp(x * dmath.ln(y))
+
+
+def _cancelled_digits(x):
+    """Return the number of digits lost by cancellation when computing
+    ``f(x) - f(0)`` for small ``x``."""
+    return max(-x.adjusted(), 0)
+
+
+def _sinhcosh_kernel(x):
+    r"""
+    Calculate ``(sinh(x), cosh(x))`` using a single exponential:
+        \sinh(x) = \frac{ e^x - e^{-x} }{ 2 }, \quad
+        \cosh(x) = \frac{ e^x + e^{-x} }{ 2 }
+    where ``e^{-x}`` is computed as ``1 / e^x``. As ``sinh`` is odd and
+    ``cosh`` is even, ``e^{|x|}`` is used so that it cannot underflow to zero
+    for large negative ``x``. The precision is increased by the number of
+    digits lost by cancellation in ``sinh`` for small ``x``.
+    """
+    if x.is_infinite():
+        return x, -x if x < 0 else x
+    with decimal.localcontext() as ctx:
+        ctx.prec += _cancelled_digits(x)
+        exp = dmath.exp(abs(x))
+        inv_exp = 1 / exp
+        sinh = (exp - inv_exp) / 2
+        return sinh.copy_sign(x), (exp + inv_exp) / 2
+
+
+@adaptive_precision
+def _sinhcosh(x):
+    """
+    Calculate ``(sinh(x), cosh(x))``, see ``_sinhcosh_kernel``.
     """
-    pi = _calc_pi()
-    return pi / 2 - _arcsin(x)
+    return _sinhcosh_kernel(x)
+
+
+@adaptive_precision
+def _sinh(x):
+    return _sinhcosh_kernel(x)[0]
+
+
+@adaptive_precision
+def _cosh(x):
+    return _sinhcosh_kernel(x)[1]
+
+
+@adaptive_precision
+def _tanh(x):
+    if x.is_infinite():
+        return decimal.Decimal(1).copy_sign(x)
+    s, c = _sinhcosh_kernel(x)
+    return s / c
+
+
+@adaptive_precision
+def _coth(x):
+    if x.is_infinite():
+        return decimal.Decimal(1).copy_sign(x)
+    s, c = _sinhcosh_kernel(x)
+    return c / s
+
+
+@adaptive_precision
+def _arcsinh(x):
+    # arcsinh is odd, use |x| to avoid cancellation in x + sqrt(x^2 + 1)
+    with decimal.localcontext() as ctx:
+        ctx.prec += _cancelled_digits(x)
+        result = dmath.ln(abs(x) + (x * x + 1).sqrt())
+    return result.copy_negate() if x.is_signed() else result
+
+
+@adaptive_precision
+def _arccosh(x):
+    with decimal.localcontext() as ctx:
+        ctx.prec += _cancelled_digits(x - 1)
+        return dmath.ln(x + ((x - 1) * (x + 1)).sqrt())
+
+
+@adaptive_precision
+def _arctanh(x):
+    with decimal.localcontext() as ctx:
+        ctx.prec += _cancelled_digits(x)
+        return dmath.ln((1 + x) / (1 - x)) / 2
+
+
+@adaptive_precision
+def _arccoth(x):
+    with decimal.localcontext() as ctx:
+        ctx.prec += max(x.adjusted(), 0)  # cancellation for huge x
+        return dmath.ln((x + 1) / (x - 1)) / 2
 
 
 def get_modules(calc):
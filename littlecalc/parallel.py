@@ -0,0 +1,178 @@
+# littlecalc
+# Copyright (C) 2017  Maximilian Timmerkamp
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Batch evaluation (see ``littlecalc.batch``) using a pool of processes.
+
+Input lines are split into chunks which are evaluated by worker processes.
+Every worker owns a ``BatchCalculator`` with the same modules loaded and the
+same precision. Results are transferred as strings and yielded in input
+order. Only a bounded number of chunks is in flight at any time, so memory
+usage does not depend on input size.
+
+As every worker has its own calculator, lines must not depend on registers
+stored by previous lines.
+"""
+
+import collections
+import concurrent.futures
+import itertools
+
+from littlecalc.batch import (
+    BatchCalculator, BatchError, BatchStats, evaluate_lines)
+
+
+MIN_CHUNK_SIZE = 1
+MAX_CHUNK_SIZE = 10000
+INITIAL_CHUNK_SIZE = 64
+TARGET_CHUNK_SECONDS = 0.05
+"""Chunk sizes are adapted to the measured cost per line such that
+evaluating a chunk takes about this long."""
+
+
+_worker_calc = None
+
+
+def _init_worker(module_names, precision):
+    global _worker_calc
+
+    _worker_calc = BatchCalculator()
+    for module_name in module_names:
+        _worker_calc.load_module_by_name(module_name)
+    if precision is not None:
+        _worker_calc.parse_input('prec {}'.format(precision))
+
+
+def _evaluate_chunk(lines, on_error):
+    """
+    Evaluate a chunk of lines in a worker process. Returns a tuple
+    ``(results, error, lines, errors, seconds)`` where ``error`` is None or a
+    tuple ``(index, line, message)`` describing the line which stopped
+    evaluation.
+    """
+    stats = BatchStats()
+    results = []
+    error = None
+    try:
+        for result in evaluate_lines(_worker_calc, lines, on_error,
+                                     stats=stats):
+            results.append(result)
+    except BatchError as err:
+        error = (err.line_number - 1, err.line, repr(err.__cause__))
+    stats.stop()
+    return results, error, stats.lines, stats.errors, stats.elapsed
+
+
+def _chunks(lines, next_size):
+    """Yield lists of lines, asking ``next_size()`` for each chunk's
+    size."""
+    lines = iter(lines)
+    while True:
+        chunk = list(itertools.islice(lines, next_size()))
+        if not chunk:
+            return
+        yield chunk
+
+
+class ParallelError(BatchError):
+
+    def __init__(self, line_number, line, message):
+        super().__init__(line_number, line)
+        self.message = message
+
+    def __str__(self):
+        return '{}: {}'.format(super().__str__(), self.message)
+
+
+def evaluate_parallel(lines, jobs, module_names, precision=None,
+                      on_error='stop', stats=None, chunk_size=None):
+    """
+    Evaluate ``lines`` using ``jobs`` worker processes and yield one result
+    string per line in input order (see ``batch.evaluate_lines``).
+
+    Each worker loads ``module_names`` using ``load_module_by_name`` and
+    sets the precision to ``precision`` if it is not None. If
+    ``chunk_size`` is None, the chunk size adapts to the measured time
+    per line. With ``on_error='stop'`` a ``ParallelError`` is raised.
+    """
+    line_cost = None  # estimated seconds per line
+
+    def next_size():
+        if chunk_size is not None:
+            return chunk_size
+        if line_cost is None:
+            return INITIAL_CHUNK_SIZE
+        size = int(TARGET_CHUNK_SECONDS / max(line_cost, 1e-9))
+        return max(MIN_CHUNK_SIZE, min(MAX_CHUNK_SIZE, size))
+
+    max_pending = 2 * jobs
+    pending = collections.deque()  # (first line number, future)
+    line_number = 1
+
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=jobs, initializer=_init_worker,
+            initargs=(tuple(module_names), precision)) as executor:
+        chunks = _chunks(lines, next_size)
+        exhausted = False
+
+        try:
+            while True:
+                while not exhausted and len(pending) < max_pending:
+                    try:
+                        chunk = next(chunks)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    future = executor.submit(
+                        _evaluate_chunk, chunk, on_error)
+                    pending.append((line_number, future))
+                    line_number += len(chunk)
+
+                if not pending:
+                    break
+
+                first, future = pending.popleft()
+                results, error, lines_done, errors, seconds = (
+                    future.result())
+
+                cost = seconds / lines_done
+                line_cost = cost if line_cost is None else (
+                    0.5 * line_cost + 0.5 * cost)
+
+                if stats is not None:
+                    stats.lines += lines_done
+                    stats.errors += errors
+
+                yield from results
+
+                if error is not None:
+                    index, line, message = error
+                    raise ParallelError(first + index, line, message)
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+
+def run_parallel(infile, outfile, jobs, module_names, precision=None,
+                 on_error='stop', stats=None):
+    """Write the results of ``evaluate_parallel`` to ``outfile``, one
+    per line."""
+    write = outfile.write
+    for result in evaluate_parallel(infile, jobs, module_names, precision,
+                                    on_error, stats):
+        write(result)
+        write('\n')
+
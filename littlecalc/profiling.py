@@ -0,0 +1,148 @@
+# littlecalc
+# Copyright (C) 2017  Maximilian Timmerkamp
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Per-operation profiling of a ``Calculator`` (see
+``Calculator.enable_profiling``).
+
+While instruments (like a ``Profile``) are attached to a calculator (see
+``Calculator.add_instrument``), the methods in its dispatch index are
+wrapped to report the time spent in every operation to the instruments,
+and ``parse_input`` and ``run`` report every line. Without instruments the
+operations' methods are called directly, so a calculator which is not
+profiled does not pay for it per operation.
+
+An instrument provides two methods, ``start`` and ``end`` are values of
+``time.perf_counter()``:
+ * ``record_operation(name, start, end)`` is called after every operation
+   with the operation's name (not an alias).
+ * ``record_line(source, start, end, words, tokenize_time, parse_time)``
+   is called after every line evaluated by ``parse_input`` or ``run``
+   with the number of words and the time spent splitting the line into
+   words and parsing numbers (both 0 for compiled programs).
+"""
+
+import bisect
+
+
+HISTOGRAM_BOUNDS = (1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1)
+"""Upper bounds (in seconds) of the buckets of the latency histograms. The
+last bucket counts all calls taking longer than ``HISTOGRAM_BOUNDS[-1]``."""
+
+HISTOGRAM_LABELS = ('<1us', '<10us', '<100us', '<1ms', '<10ms', '<100ms',
+                    '<1s', '>=1s')
+
+
+class OperationStats:
+    """Call count, total and maximum time and latency histogram of one
+    operation."""
+
+    __slots__ = ('count', 'total', 'max', 'histogram')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.histogram = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.histogram[bisect.bisect_left(HISTOGRAM_BOUNDS, seconds)] += 1
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'total': self.total,
+            'max': self.max,
+            'histogram': dict(zip(HISTOGRAM_LABELS, self.histogram)),
+        }
+
+
+class Profile:
+    """
+    Data collected while profiling a calculator.
+
+    ``operations`` maps operation names (not aliases) to their
+    ``OperationStats``. Times are inclusive, i.e. an operation calling
+    other operations is charged for them as well.
+
+    ``tokenize_time`` and ``parse_time`` are the total times spent in
+    ``parse_input`` splitting lines into words and converting words to
+    numbers (or finding out that they are not numeric).
+    """
+
+    def __init__(self):
+        self.operations = {}
+        self.lines = 0
+        self.words = 0
+        self.tokenize_time = 0.0
+        self.parse_time = 0.0
+
+    def record_operation(self, name, start, end):
+        try:
+            stats = self.operations[name]
+        except KeyError:
+            stats = self.operations[name] = OperationStats()
+        stats.add(end - start)
+
+    def record_line(self, source, start, end, words, tokenize_time,
+                    parse_time):
+        self.lines += 1
+        self.words += words
+        self.tokenize_time += tokenize_time
+        self.parse_time += parse_time
+
+    def reset(self):
+        self.__init__()
+
+    def as_dict(self):
+        """Return the collected data as a dict of plain Python objects."""
+        return {
+            'operations': {name: stats.as_dict()
+                           for name, stats in self.operations.items()},
+            'lines': self.lines,
+            'words': self.words,
+            'tokenize_time': self.tokenize_time,
+            'parse_time': self.parse_time,
+        }
+
+    def format_table(self):
+        """Return a table of all operations sorted by total time (most
+        expensive first)."""
+        rows = ['{:<12} {:>8} {:>11} {:>10} {:>10}  {}'.format(
+            'operation', 'calls', 'total [ms]', 'mean [us]', 'max [us]',
+            ' '.join('{:>6}'.format(label) for label in HISTOGRAM_LABELS))]
+        ranked = sorted(self.operations.items(),
+                        key=lambda item: item[1].total, reverse=True)
+        row = '{:<12} {:>8} {:>11.3f} {:>10.1f} {:>10.1f}  {}'
+        for name, stats in ranked:
+            rows.append(row.format(
+                name, stats.count, stats.total * 1e3, stats.mean * 1e6,
+                stats.max * 1e6,
+                ' '.join('{:>6}'.format(n) for n in stats.histogram)))
+        rows.append('{} lines, {} words: tokenizing {:.3f} ms, parsing '
+                    'numbers {:.3f} ms'.format(
+                        self.lines, self.words, self.tokenize_time * 1e3,
+                        self.parse_time * 1e3))
+        return '\n'.join(rows)
+
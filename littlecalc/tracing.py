@@ -0,0 +1,189 @@
+# littlecalc
+# Copyright (C) 2017  Maximilian Timmerkamp
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Execution traces in the Chrome trace-event format, which can be opened
+using Perfetto (https://ui.perfetto.dev) or ``chrome://tracing``.
+
+While tracing is started (see ``start``), spans are recorded into the ring
+buffer of the ``Tracer`` in ``tracer``:
+ * lines evaluated and operations dispatched by calculators the tracer is
+   attached to as instrument (see ``Calculator.add_instrument``),
+ * loading and unloading modules,
+ * computations of constants (``littlecalc.dmath`` and the ``constants``
+   module) and
+ * evaluations of functions decorated with ``adaptive_precision`` in the
+   ``decimal`` module, including the number of retries with higher
+   precision.
+
+Code recording spans checks ``tracing.tracer is not None`` first (or uses
+``span``), so the overhead while tracing is stopped is a single attribute
+lookup. ``json`` and ``threading`` are only imported once tracing is
+used, as this module is imported on every start.
+"""
+
+import os
+import time
+from collections import deque
+
+
+BUFFER_SIZE = 100000
+"""Default number of spans kept, older spans are dropped."""
+
+tracer = None
+"""The ``Tracer`` recording spans or None if tracing is stopped."""
+
+_last_tracer = None
+
+
+class Tracer:
+    """Ring buffer of spans, see ``Tracer.add``."""
+
+    def __init__(self, size=BUFFER_SIZE):
+        import threading
+
+        self.spans = deque(maxlen=size)
+        self.pid = os.getpid()
+        self._get_ident = threading.get_ident
+
+    def add(self, name, category, start, end, args=None):
+        """
+        Record a span ``name`` of ``category`` (e.g. ``'operation'``) from
+        ``start`` to ``end`` (values of ``time.perf_counter()``). ``args``
+        is None or a dict of JSON serializable values shown with the span.
+        """
+        self.spans.append((name, category, start, end,
+                           self._get_ident(), args))
+
+    def span(self, name, category, args=None):
+        """Return a context manager recording a span around its body."""
+        return _Span(self, name, category, args)
+
+    def record_operation(self, name, start, end):
+        self.add(name, 'operation', start, end)
+
+    def record_line(self, source, start, end, words, tokenize_time,
+                    parse_time):
+        self.add(source.strip() or '(empty line)', 'line', start, end)
+
+    def events(self):
+        """Return the recorded spans as list of trace events."""
+        thread_ids = {}
+        events = []
+        for name, category, start, end, thread, args in self.spans:
+            event = {
+                'name': name,
+                'cat': category,
+                'ph': 'X',
+                'ts': start * 1e6,
+                'dur': (end - start) * 1e6,
+                'pid': self.pid,
+                'tid': thread_ids.setdefault(thread, len(thread_ids) + 1),
+            }
+            if args:
+                event['args'] = args
+            events.append(event)
+        return events
+
+    def dump(self, file):
+        """Write all recorded spans as trace-event JSON to the file object
+        ``file``."""
+        import json
+
+        json.dump({'traceEvents': self.events(), 'displayTimeUnit': 'ms'},
+                  file)
+
+    def clear(self):
+        self.spans.clear()
+
+    def __len__(self):
+        return len(self.spans)
+
+
+class _Span:
+
+    __slots__ = ('tracer', 'name', 'category', 'args', 'start')
+
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.tracer.add(self.name, self.category, self.start,
+                        time.perf_counter(), self.args)
+
+
+class _NullSpan:
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name, category, args=None, name_args=()):
+    """Return a context manager recording a span around its body if tracing
+    is started (a no-op otherwise). Meant for code which is not run very
+    often, hot paths should check ``tracer`` directly.
+
+    If ``name_args`` are given, the span is named
+    ``name.format(*name_args)``. The name is only formatted while tracing
+    is started."""
+    if tracer is None:
+        return _NULL_SPAN
+    if name_args:
+        name = name.format(*name_args)
+    return _Span(tracer, name, category, args)
+
+
+def start(size=BUFFER_SIZE):
+    """Start tracing into a new ``Tracer`` keeping ``size`` spans and return
+    it. Tracing already started is continued."""
+    global tracer, _last_tracer
+
+    if tracer is None:
+        tracer = _last_tracer = Tracer(size)
+    return tracer
+
+
+def stop():
+    """Stop tracing. The spans recorded are kept for ``dump``."""
+    global tracer
+
+    tracer = None
+
+
+def dump(path):
+    """Write the spans of the current (or last) tracer to ``path``. Returns
+    the number of spans written."""
+    current = tracer if tracer is not None else _last_tracer
+    if current is None:
+        return 0
+    with open(path, 'w') as file:
+        current.dump(file)
+    return len(current)
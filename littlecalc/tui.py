@@ -15,12 +15,15 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import traceback
-import readline
+import argparse
+import sys
 
 from littlecalc.core import Calculator, CalculatorError
 
 
+DEFAULT_MODULES = ('builtins', 'decimal', 'constants')
+
+
 class TUICalculator(Calculator):
 
     def __init__(self):
@@ -30,12 +33,77 @@ class TUICalculator(Calculator):
         print(text)
 
 
-def main():
-    calc = TUICalculator()
+def load_default_modules(calc, lazy=False):
+    # The default modules are needed by almost every line, so registering
+    # them lazily would only defer their import to the first line.
+    for module_name in DEFAULT_MODULES:
+        calc.load_module_by_name(module_name, lazy=lazy)
+
+
+def load_modules(calc, module_names):
+    """Load the default modules and register ``module_names`` lazily (see
+    ``Calculator.load_module_by_name``), they are imported on first use."""
+    load_default_modules(calc)
+    for module_name in module_names:
+        calc.load_module_by_name(module_name, lazy=True)
 
-    calc.load_module_by_name('builtins')
-    calc.load_module_by_name('decimal')
-    calc.load_module_by_name('constants')
+
+def batch_main(args):
+    from littlecalc import batch
+
+    calc = batch.BatchCalculator()
+    load_modules(calc, args.modules)
+    if args.prec is not None:
+        calc.parse_input('prec {}'.format(args.prec))
+    if args.profile:
+        calc.enable_profiling()
+    if args.trace is not None:
+        from littlecalc import tracing
+        calc.add_instrument(tracing.start())
+
+    if args.batch == '-':
+        infile = sys.stdin
+    else:
+        infile = open(args.batch, 'r')
+
+    stats = batch.BatchStats()
+    with open(sys.stdout.fileno(), 'w', buffering=1 << 16,
+              closefd=False) as outfile:
+        try:
+            if args.jobs > 1:
+                from littlecalc import parallel
+                parallel.run_parallel(infile, outfile, args.jobs,
+                                      DEFAULT_MODULES + tuple(args.modules),
+                                      args.prec,
+                                      args.on_error, stats)
+            else:
+                batch.run_batch(calc, infile, outfile, args.on_error,
+                                args.keep_stack, stats)
+        except batch.BatchError as err:
+            if err.__cause__ is not None:
+                print('{}: {!r}'.format(err, err.__cause__), file=sys.stderr)
+            else:
+                print(err, file=sys.stderr)
+            return 1
+        finally:
+            stats.stop()
+            if infile is not sys.stdin:
+                infile.close()
+            if args.stats:
+                print(stats, file=sys.stderr)
+            if args.profile:
+                print(calc.profile.format_table(), file=sys.stderr)
+            if args.trace is not None:
+                tracing.dump(args.trace)
+    return 0
+
+
+def interactive_main(args):
+    if sys.stdin.isatty():
+        import readline  # noqa: F401 (enables line editing for input())
+
+    calc = TUICalculator()
+    load_modules(calc, args.modules)
 
     while True:
         try:
@@ -47,6 +115,7 @@ def main():
         try:
             calc.parse_input(user_input)
         except CalculatorError:
+            import traceback
             print('An error occurred:')
             traceback.print_exc()
 
@@ -57,5 +126,67 @@ def main():
                 print('{}: {}'.format(level_name, value))
 
 
+def main(argv=None):
+    from littlecalc.batch import ERROR_POLICIES
+
+    parser = argparse.ArgumentParser(
+        description='A little expandable rpn calculator.')
+    parser.add_argument(
+        '--batch', nargs='?', const='-', metavar='FILE',
+        help='evaluate every line of FILE (default: stdin) and write the '
+             'X register after each line to stdout')
+    parser.add_argument(
+        '--on-error', choices=ERROR_POLICIES, default='stop',
+        help='in batch mode: stop, skip the line or write NaN if a line '
+             'cannot be evaluated (default: stop)')
+    parser.add_argument(
+        '--keep-stack', action='store_true',
+        help='in batch mode: do not clear the stack after each line')
+    parser.add_argument(
+        '--stats', action='store_true',
+        help='in batch mode: report throughput to stderr')
+    parser.add_argument(
+        '--profile', action='store_true',
+        help='in batch mode: report the time spent in every operation to '
+             'stderr (see the "stats" operation)')
+    parser.add_argument(
+        '--trace', metavar='FILE',
+        help='in batch mode: write an execution trace in the Chrome '
+             'trace-event format to FILE (see the "trace" operation)')
+    parser.add_argument(
+        '--jobs', type=int, default=1, metavar='N',
+        help='in batch mode: evaluate lines using N processes, lines must '
+             'not depend on registers stored by other lines (default: 1)')
+    parser.add_argument(
+        '--module', action='append', default=[], dest='modules',
+        metavar='NAME',
+        help='load module NAME in addition to the default modules, it is '
+             'imported on first use of one of its operations (can be '
+             'given multiple times)')
+    parser.add_argument(
+        '--prec', type=int, default=None, metavar='DIGITS',
+        help='in batch mode: decimal precision')
+    args = parser.parse_args(argv)
+
+    if args.jobs < 1:
+        parser.error('--jobs must be at least 1')
+    if args.jobs > 1 and args.keep_stack:
+        parser.error('--keep-stack cannot be combined with --jobs')
+    if args.jobs > 1 and (args.profile or args.trace is not None):
+        parser.error('--profile and --trace cannot be combined with --jobs')
+
+    try:
+        if args.batch is not None:
+            return batch_main(args)
+        interactive_main(args)
+    except CalculatorError as err:  # e.g. a module given by --module
+        if err.__cause__ is not None:
+            print('{}: {!r}'.format(err, err.__cause__), file=sys.stderr)
+        else:
+            print(err, file=sys.stderr)
+        return 1
+    return 0
+
+
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
@@ -109,8 +109,10 @@ setup(
     # If there are data files included in your packages that need to be
     # installed, specify them here.  If using Python 2.6 or less, then these
     # have to be included in MANIFEST.in as well.
-    # package_data={
-    # },
+    package_data={
+        # read by lazy loading, see littlecalc.core.read_manifest
+        'littlecalc.modules': ['*.manifest'],
+    },
     # include_package_data=True,
 
     # Although 'package_data' is the preferred approach, in some case you may
@@ -125,6 +127,7 @@ setup(
     entry_points={
         'console_scripts': [
             'littlecalc=littlecalc.tui:main',
+            'littlecalc-columns=littlecalc.columnar:main',
         ],
     },
 )
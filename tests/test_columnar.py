@@ -0,0 +1,198 @@
+# littlecalc
+# Copyright (C) 2017  Maximilian Timmerkamp
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import contextlib
+import io
+import math
+import unittest
+from unittest import mock
+
+from littlecalc import columnar
+from littlecalc.core import Calculator, CalculatorError
+from littlecalc.tui import load_default_modules
+
+
+COLUMNS = {'a': ['8', '27', '0.5'], 'b': ['2', '3', '4']}
+
+EXPRESSIONS = [
+    'rcl a log2',
+    'rcl a logb 2',
+    'rcl a logb 3 rcl b +',
+    'rcl a rcl b log',
+]
+
+INF, NAN = math.inf, math.nan
+
+SPECIAL_CASES = [
+    # expression, values of register a, expected results
+    ('rcl a sqrt', ['4', '-1', '0'], [2, NAN, 0]),
+    ('rcl a ln', ['1', '0', '-1'], [0, -INF, NAN]),
+    ('rcl a log2', ['8', '0', '-8'], [3, -INF, NAN]),
+    ('rcl a inv', ['2', '0', '-0'], [0.5, INF, -INF]),
+    ('rcl a 0 /', ['1', '-1', '0'], [INF, -INF, NAN]),
+    ('rcl a 3 inv pow', ['8', '-8', '0'], [2, NAN, 0]),
+    ('rcl a 3 root', ['8', '-8', '0'], [2, NAN, 0]),
+    ('rcl a -1 pow', ['2', '0', '-0'], [0.5, INF, -INF]),
+    ('rcl a 1001 pow', ['-10', '10', '-0.5'], [-INF, INF, -0.0]),
+    ('2 rcl a log', ['8', '1', '0'], [1 / 3, INF, -0.0]),
+    ('rcl a exp', ['1000', '-1000', '0'], [INF, 0, 1]),
+    ('rcl a sinh', ['1000', '-1000', '0'], [INF, -INF, 0]),
+    ('rcl a cosh', ['1000', '-1000', '0'], [INF, INF, 1]),
+    ('rcl a sinhcosh +', ['1000', '-1000', '0'], [INF, NAN, 1]),
+    ('rcl a arcsin', ['1', '2', '-2'], [math.pi / 2, NAN, NAN]),
+    ('rcl a arccosh', ['1', '0.5', '-1'], [0, NAN, NAN]),
+    ('rcl a arctanh', ['1', '-1', '2'], [INF, -INF, NAN]),
+    ('rcl a arccoth', ['1', '-1', '0.5'], [INF, -INF, NAN]),
+    ('rcl a cot', ['0', '-0', '1'], [INF, -INF, 1 / math.tan(1)]),
+    ('rcl a coth', ['0', '-0', '1'], [INF, -INF, 1 / math.tanh(1)]),
+    ('rcl a sin', ['inf', '-inf', 'nan'], [NAN, NAN, NAN]),
+    ('rcl a floor', ['inf', '-2.5', 'nan'], [INF, -3, NAN]),
+    ('rcl a ceil', ['-inf', '2.5', 'nan'], [-INF, 3, NAN]),
+    ('rcl a -1 sqrt min', ['1', '-1', '0'], [NAN, NAN, NAN]),
+    ('rcl a 0 max', ['nan', '-1', '1'], [NAN, 0, 1]),
+    ('-8 3 inv pow', ['1', '2', '3'], [NAN, NAN, NAN]),
+    ('0 inv rcl a +', ['1', '-inf', '3'], [INF, NAN, INF]),
+]
+"""Expressions evaluated by the float backend with and without NumPy."""
+
+
+class FakeNumpy:
+    """Stands in for NumPy to compare the names of the NumPy kernels with
+    ``FLOAT_KERNELS``."""
+
+    pi = None
+
+    def __getattr__(self, name):
+        return name
+
+
+class CountingCalculator(Calculator):
+
+    def __init__(self):
+        super().__init__()
+        self.compiled = 0
+
+    def compile(self, input_):
+        self.compiled += 1
+        return super().compile(input_)
+
+
+class ColumnarTest(unittest.TestCase):
+
+    def setUp(self):
+        self.calc = Calculator()
+        load_default_modules(self.calc)
+
+    def evaluate_rows(self, expression):
+        """Evaluate ``expression`` row by row using ``parse_input``."""
+        results = []
+        for a, b in zip(COLUMNS['a'], COLUMNS['b']):
+            self.calc.parse_input('{} sto a {} sto b {}'.format(
+                a, b, expression))
+            results.append(self.calc.stack.pop())
+        return results
+
+    def test_decimal_backend(self):
+        for expression in EXPRESSIONS:
+            with self.subTest(expression=expression):
+                self.assertEqual(
+                    columnar.evaluate_columns(self.calc, expression, COLUMNS),
+                    self.evaluate_rows(expression))
+
+    def test_float_backend(self):
+        for expression in EXPRESSIONS:
+            with self.subTest(expression=expression):
+                results = columnar.evaluate_columns(
+                    self.calc, expression, COLUMNS, 'float')
+                for result, expected in zip(results,
+                                            self.evaluate_rows(expression)):
+                    self.assertAlmostEqual(result, float(expected))
+
+    def test_lazy_modules(self):
+        for backend in columnar.BACKENDS:
+            for expression in EXPRESSIONS + ['rcl a const pi *']:
+                with self.subTest(backend=backend, expression=expression):
+                    calc = CountingCalculator()
+                    load_default_modules(calc, lazy=True)
+                    columnar.evaluate_columns(
+                        calc, expression, COLUMNS, backend)
+                    # Calculator.run recompiles outdated programs, which
+                    # would drop the kernels.
+                    self.assertEqual(calc.compiled, 1)
+
+    def test_vectorize_generation(self):
+        calc = Calculator()
+        load_default_modules(calc, lazy=True)
+        program = columnar.vectorize(calc, calc.compile('rcl a logb 2'), 3)
+        self.assertEqual(program.generation, calc.generation)
+
+    def test_stream_argument_missing(self):
+        for backend in columnar.BACKENDS:
+            with self.subTest(backend=backend):
+                with self.assertRaises(CalculatorError):
+                    columnar.evaluate_columns(
+                        self.calc, 'rcl a logb', COLUMNS, backend)
+
+    def main(self, argv, stdin):
+        with mock.patch('sys.stdin', io.StringIO(stdin)), \
+                contextlib.redirect_stdout(io.StringIO()) as stdout, \
+                contextlib.redirect_stderr(io.StringIO()) as stderr:
+            status = columnar.main(argv)
+        return status, stdout.getvalue(), stderr.getvalue()
+
+    def test_main_domain_error(self):
+        # sqrt of a negative row raises in the decimal backend
+        status, _, stderr = self.main(['rcl a sqrt'], 'a\n4\n-1\n')
+        self.assertEqual(status, 1)
+        self.assertIn('An error occurred', stderr)
+
+    @mock.patch.multiple(columnar, numpy=None, NUMPY_KERNELS=None)
+    def test_main_float_nan(self):
+        status, stdout, _ = self.main(
+            ['rcl a sqrt', '--backend', 'float'], 'a\n4\n-1\n')
+        self.assertEqual(status, 0)
+        self.assertEqual(stdout, '2.0\nnan\n')
+
+    def check_special_cases(self):
+        for expression, values, expected in SPECIAL_CASES:
+            with self.subTest(expression=expression):
+                results = columnar.evaluate_columns(
+                    self.calc, expression, {'a': values}, 'float')
+                self.assertEqual(len(results), len(expected))
+                for result, value in zip(results, expected):
+                    self.assertIsInstance(float(result), float)
+                    if math.isnan(value):
+                        self.assertTrue(math.isnan(result), result)
+                    else:
+                        self.assertAlmostEqual(result, value)
+                        self.assertEqual(math.copysign(1, result),
+                                         math.copysign(1, value))
+
+    @mock.patch.multiple(columnar, numpy=None, NUMPY_KERNELS=None)
+    def test_special_values_array(self):
+        self.check_special_cases()
+
+    @unittest.skipIf(columnar.numpy is None, 'NumPy is not installed')
+    def test_special_values_numpy(self):
+        self.check_special_cases()
+
+    def test_numpy_kernels_complete(self):
+        self.assertEqual(set(columnar._numpy_kernels(FakeNumpy())),
+                         set(columnar.FLOAT_KERNELS))
+
+
+if __name__ == '__main__':
+    unittest.main()
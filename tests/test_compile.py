@@ -0,0 +1,109 @@
+# littlecalc
+# Copyright (C) 2017  Maximilian Timmerkamp
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import tempfile
+import unittest
+
+from littlecalc import tracing
+from littlecalc.core import Calculator, NoSuchOperation
+
+
+class RecordingCalculator(Calculator):
+
+    def __init__(self):
+        super().__init__()
+        self.outputs = []
+
+    def output(self, text):
+        self.outputs.append(text)
+
+
+class CompileTest(unittest.TestCase):
+    """Compiled programs (see ``Calculator.compile``) leave the same stack
+    as interpreting their source by ``parse_input``."""
+
+    def make_calculator(self):
+        calc = RecordingCalculator()
+        for module_name in ('builtins', 'decimal', 'constants'):
+            calc.load_module_by_name(module_name)
+        return calc
+
+    def assertCompiledEqual(self, source):
+        interpreted = self.make_calculator()
+        interpreted.parse_input(source)
+
+        compiled = self.make_calculator()
+        compiled.run(compiled.compile(source))
+
+        self.assertEqual(compiled.stack.stack, interpreted.stack.stack)
+        self.assertEqual(compiled.storage, interpreted.storage)
+        self.assertEqual(len(compiled.outputs), len(interpreted.outputs))
+        return interpreted, compiled
+
+    def test_arithmetic(self):
+        self.assertCompiledEqual('2 3 + 4 * sto a rcl a sqrt')
+
+    def test_stream_args(self):
+        # sto, rcl and const pull their argument from the input stream
+        self.assertCompiledEqual('5 sto a 7 sto b rcl a rcl b - const pi *')
+
+    def test_run_repeatedly(self):
+        calc = self.make_calculator()
+        program = calc.compile('2 sto a rcl a 3 +')
+        calc.run(program)
+        calc.run(program)
+        self.assertEqual(list(calc.stack.stack), [5, 5])
+
+    def test_recompile_after_module_change(self):
+        calc = self.make_calculator()
+        program = calc.compile('const pi')
+        generation = program.generation
+
+        calc.unload_module_by_name('constants')
+        with self.assertRaises(NoSuchOperation):
+            calc.run(program)
+
+        calc.load_module_by_name('constants')
+        calc.run(program)
+        self.assertNotEqual(program.generation, generation)
+        self.assertEqual(program.generation, calc.generation)
+        self.assertEqual(str(calc.stack.pop())[:7], '3.14159')
+
+    def test_stats(self):
+        for source in ('stats 2 3 +', 'stats on 2 3 +',
+                       'stats on 2 3 + stats off', 'stats reset 2 3 +'):
+            with self.subTest(source=source):
+                interpreted, compiled = self.assertCompiledEqual(source)
+                self.assertEqual(compiled.profile is None,
+                                 interpreted.profile is None)
+
+    def test_trace(self):
+        self.addCleanup(tracing.stop)
+        for source in ('trace on 2 3 +', 'trace off 2 3 +'):
+            with self.subTest(source=source):
+                self.assertCompiledEqual(source)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'trace.json')
+            interpreted, compiled = self.assertCompiledEqual(
+                'trace dump {} 2 3 +'.format(path))
+            self.assertTrue(os.path.exists(path))
+            self.assertEqual(compiled.outputs[0][-len(path):], path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+# littlecalc
+# Copyright (C) 2017  Maximilian Timmerkamp
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import decimal
+import threading
+import unittest
+from unittest import mock
+
+from littlecalc import dmath
+
+
+class LnBaseTest(unittest.TestCase):
+
+    @mock.patch.object(dmath, 'LN_BASE_CACHE_SIZE', 4)
+    def test_threads(self):
+        """Threads sharing the LRU cache of ``ln_base`` while it evicts
+        bases all the time."""
+        bases = [decimal.Decimal(b) for b in range(3, 40)]
+        errors = []
+
+        def work():
+            try:
+                with decimal.localcontext() as ctx:
+                    ctx.prec = 20
+                    for _ in range(20):
+                        for b in bases:
+                            if dmath.ln_base(b) != b.ln():
+                                errors.append(b)
+            except Exception as err:
+                errors.append(err)
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertLessEqual(len(dmath._LN_BASES), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
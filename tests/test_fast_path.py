@@ -0,0 +1,85 @@
+# littlecalc
+# Copyright (C) 2017  Maximilian Timmerkamp
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import decimal
+import math
+import random
+import unittest
+
+from littlecalc.modules.decimal import (
+    FAST_PATH_MAX_PREC, FAST_PATH_STATS, _arctan, _cos, _ln, _sin, _ulp)
+
+
+FUNCTIONS = [
+    ('sin', _sin, (-30, 30)),
+    ('cos', _cos, (-30, 30)),
+    ('ln', _ln, (-300, 300)),
+    ('arctan', _arctan, (-30, 30)),
+]
+"""Name, function and range of decimal exponents of the arguments."""
+
+ROUNDINGS = [decimal.ROUND_HALF_EVEN, decimal.ROUND_DOWN, decimal.ROUND_UP,
+             decimal.ROUND_FLOOR, decimal.ROUND_CEILING]
+
+SAMPLES = 100
+"""Random arguments per function and precision."""
+
+
+def random_argument(rng, exponents, positive):
+    digits = rng.randint(1, 20)
+    coefficient = rng.randrange(10**(digits - 1), 10**digits)
+    exponent = rng.randint(*exponents) - digits + 1
+    sign = 0 if positive or rng.random() < 0.5 else 1
+    return decimal.Decimal((sign, tuple(map(int, str(coefficient))),
+                            exponent))
+
+
+class FastPathTest(unittest.TestCase):
+    """Results of the float fast path equal the arbitrary precision code it
+    falls back to."""
+
+    def test_all_functions_covered(self):
+        self.assertEqual(set(FAST_PATH_STATS),
+                         {name for name, _, _ in FUNCTIONS})
+
+    def test_compare_with_slow_path(self):
+        rng = random.Random(0)
+        for name, func, exponents in FUNCTIONS:
+            slow = func.__wrapped__
+            for prec in range(1, FAST_PATH_MAX_PREC + 1):
+                with decimal.localcontext() as ctx:
+                    ctx.prec = prec
+                    for _ in range(SAMPLES):
+                        ctx.rounding = rng.choice(ROUNDINGS)
+                        x = random_argument(rng, exponents, name == 'ln')
+                        with self.subTest(func=name, x=x, prec=prec,
+                                          rounding=ctx.rounding):
+                            self.assertEqual(func(x), slow(x))
+
+    @unittest.skipUnless(hasattr(math, 'ulp'), 'requires Python >= 3.9')
+    def test_ulp(self):
+        rng = random.Random(0)
+        values = [0.0, 5e-324, 1e-310, 2.2250738585072014e-308, 0.5, 1.0,
+                  -3.0, 1e308, 1.7976931348623157e308]
+        values += [math.ldexp(rng.random(), rng.randint(-1074, 1024))
+                   for _ in range(1000)]
+        for x in values:
+            with self.subTest(x=x):
+                self.assertEqual(_ulp(x), math.ulp(x))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+# littlecalc
+# Copyright (C) 2017  Maximilian Timmerkamp
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import contextlib
+import importlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from littlecalc.core import Calculator, read_manifest
+from littlecalc.tui import DEFAULT_MODULES, load_modules, main
+
+
+THIRD_PARTY_MODULE = '''
+from littlecalc.core import Module, operation
+
+__manifest__ = {'operations': ['twice']}
+
+
+class TwiceModule(Module):
+
+    @operation('twice', type='stack', arg_count=1)
+    def twice(x):
+        return 2 * x
+
+
+def get_modules(calc):
+    return [TwiceModule('twice')]
+'''
+
+
+class LazyLoadingTest(unittest.TestCase):
+    """Modules registered lazily are loaded on first use or explicitly by
+    ``loadmod``."""
+
+    def setUp(self):
+        self.calc = Calculator()
+        for module_name in ('builtins', 'decimal', 'constants'):
+            self.calc.load_module_by_name(module_name, lazy=True)
+
+    def test_loadmod_lazily_registered(self):
+        self.calc.parse_input('loadmod constants')
+        self.assertNotIn('constants', self.calc.lazy_modules)
+        self.assertNotIn('const', self.calc.lazy_operations)
+        self.assertIsNotNone(self.calc.get_module('constants'))
+
+        self.calc.parse_input('const pi')
+        self.assertEqual(str(self.calc.stack.pop())[:7], '3.14159')
+
+    def test_load_on_first_use(self):
+        self.calc.parse_input('2 3 +')
+        self.assertEqual(self.calc.stack.pop(), 5)
+        self.assertNotIn('decimal', self.calc.lazy_modules)
+        self.assertIn('constants', self.calc.lazy_modules)
+
+    def test_unloadmod_lazily_registered(self):
+        self.calc.parse_input('unloadmod constants')
+        self.assertNotIn('constants', self.calc.lazy_modules)
+        self.assertFalse(self.calc.is_executable('const'))
+
+
+class ManifestTest(unittest.TestCase):
+    """The manifests of all builtin modules list exactly the names they
+    register."""
+
+    def test_manifest_matches_operations(self):
+        for module_name in DEFAULT_MODULES:
+            with self.subTest(module=module_name):
+                module = importlib.import_module(
+                    'littlecalc.modules.' + module_name)
+                calc = Calculator()
+                calc.load_module_by_name(module_name)
+
+                names = set()
+                for calc_module in calc.modules:
+                    names.update(calc_module._operation_names)
+                self.assertEqual(
+                    set(module.__manifest__['operations']), names)
+                self.assertEqual(
+                    len(module.__manifest__['operations']), len(names))
+                self.assertEqual(
+                    set(module.__manifest__.get('numeric_types', ())),
+                    {cls.__name__ for cls in calc.numeric_types})
+
+    def test_manifest_file(self):
+        calc = Calculator()
+        for module_name in DEFAULT_MODULES:
+            with self.subTest(module=module_name):
+                module = importlib.import_module(
+                    'littlecalc.modules.' + module_name)
+                manifest = read_manifest(calc._find_module_spec(module_name))
+                self.assertEqual(manifest, module.__manifest__)
+
+
+class ThirdPartyModuleTest(unittest.TestCase):
+    """Modules outside of ``littlecalc.modules`` given on the command line
+    are imported on first use."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        with open(os.path.join(self.directory, 'lc_twice.py'), 'w') as f:
+            f.write(THIRD_PARTY_MODULE)
+        sys.path.insert(0, self.directory)
+        self.addCleanup(sys.path.remove, self.directory)
+        self.addCleanup(sys.modules.pop, 'lc_twice', None)
+        importlib.invalidate_caches()
+
+        self.calc = Calculator()
+
+    def write_manifest(self, text):
+        with open(os.path.join(self.directory, 'lc_twice.manifest'),
+                  'w') as f:
+            f.write(text)
+
+    def test_load_on_first_use(self):
+        self.write_manifest('# comment\n\noperations: twice\n')
+        load_modules(self.calc, ['lc_twice'])
+        self.assertIn('lc_twice', self.calc.lazy_modules)
+        self.assertNotIn('lc_twice', sys.modules)
+
+        self.calc.parse_input('21 twice')
+        self.assertEqual(self.calc.stack.pop(), 42)
+        self.assertIn('lc_twice', sys.modules)
+        self.assertNotIn('lc_twice', self.calc.lazy_modules)
+
+    def test_without_manifest(self):
+        load_modules(self.calc, ['lc_twice'])
+        self.assertNotIn('lc_twice', self.calc.lazy_modules)
+        self.assertIn('lc_twice', sys.modules)
+        self.calc.parse_input('21 twice')
+        self.assertEqual(self.calc.stack.pop(), 42)
+
+    def test_malformed_manifest(self):
+        self.write_manifest('twice\n')
+        load_modules(self.calc, ['lc_twice'])
+        self.assertNotIn('lc_twice', self.calc.lazy_modules)
+        self.assertIn('lc_twice', sys.modules)
+
+    def test_unknown_module(self):
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            status = main(['--batch', os.devnull, '--module', 'lc_missing'])
+        self.assertEqual(status, 1)
+        self.assertIn('lc_missing', stderr.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
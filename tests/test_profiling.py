@@ -0,0 +1,82 @@
+# littlecalc
+# Copyright (C) 2017  Maximilian Timmerkamp
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from littlecalc.core import Calculator
+from littlecalc.tui import load_default_modules
+
+
+class ProfilingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.calc = Calculator()
+        load_default_modules(self.calc)
+
+    def test_parse_input(self):
+        self.calc.enable_profiling()
+        self.calc.parse_input('2 3 + 4 * sqrt')
+        self.calc.parse_input('1 2 +')
+
+        profile = self.calc.profile
+        self.assertEqual(profile.operations['add'].count, 2)
+        self.assertEqual(profile.operations['mul'].count, 1)
+        self.assertEqual(profile.operations['sqrt'].count, 1)
+        self.assertEqual(profile.lines, 2)
+        self.assertEqual(profile.words, 9)
+
+    def test_run(self):
+        program = self.calc.compile('2 3 + sqrt')
+        self.calc.run(program)
+        self.calc.enable_profiling()
+        self.calc.run(program)
+        self.calc.run(program)
+
+        profile = self.calc.profile
+        self.assertEqual(profile.operations['add'].count, 2)
+        self.assertEqual(profile.operations['sqrt'].count, 2)
+        self.assertEqual(profile.lines, 2)
+
+    def test_disable(self):
+        methods = dict(self.calc.operations)
+        self.calc.enable_profiling()
+        self.assertNotEqual(self.calc.operations['+'], methods['+'])
+
+        self.calc.disable_profiling()
+        self.calc.parse_input('2 3 +')
+        self.assertNotIn('add', self.calc.profile.operations)
+        self.assertEqual(self.calc.operations['+'][2], methods['+'][2])
+
+    def test_subclass_override(self):
+        lines = []
+
+        class LoggingCalculator(Calculator):
+
+            def parse_input(self, input_):
+                lines.append(input_)
+                super().parse_input(input_)
+
+        calc = LoggingCalculator()
+        load_default_modules(calc)
+        calc.enable_profiling()
+        calc.parse_input('2 3 +')
+
+        self.assertEqual(lines, ['2 3 +'])
+        self.assertEqual(calc.profile.operations['add'].count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
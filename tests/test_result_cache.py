@@ -0,0 +1,159 @@
+# littlecalc
+# Copyright (C) 2017  Maximilian Timmerkamp
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import decimal
+import unittest
+
+from littlecalc.core import (
+    Calculator, CalculatorError, ResultCache, _MISSING, _value_key)
+from littlecalc.tui import load_default_modules
+
+
+class ResultCacheTest(unittest.TestCase):
+
+    def test_value_key(self):
+        self.assertNotEqual(_value_key(1), _value_key(1.0))
+        self.assertNotEqual(_value_key(decimal.Decimal('1')),
+                            _value_key(decimal.Decimal('1.0')))
+        self.assertNotEqual(_value_key(1), _value_key(decimal.Decimal('1')))
+        self.assertEqual(_value_key(decimal.Decimal('1.0')),
+                         _value_key(decimal.Decimal('1.0')))
+
+    def test_evict_entries(self):
+        cache = ResultCache(max_entries=2)
+        cache.put('a', 1, 10)
+        cache.put('b', 2, 10)
+        self.assertEqual(cache.get('a'), 1)  # 'b' is least recently used
+        cache.put('c', 3, 10)
+
+        self.assertEqual(len(cache), 2)
+        self.assertIs(cache.get('b'), _MISSING)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(cache.bytes, 20)
+
+    def test_evict_bytes(self):
+        cache = ResultCache(max_bytes=100)
+        cache.put('a', 1, 40)
+        cache.put('b', 2, 40)
+        cache.put('c', 3, 40)
+        self.assertEqual(list(cache.entries), ['b', 'c'])
+        self.assertEqual(cache.bytes, 80)
+
+        cache.put('d', 4, 101)  # larger than the whole cache
+        self.assertEqual(list(cache.entries), ['b', 'c'])
+
+        cache.put('b', 5, 70)  # replacing an entry updates its size
+        self.assertEqual(list(cache.entries), ['b'])
+        self.assertEqual(cache.bytes, 70)
+
+    def test_resize(self):
+        cache = ResultCache()
+        for i in range(10):
+            cache.put(i, i, 10)
+        cache.resize(max_entries=5)
+        self.assertEqual(list(cache.entries), [5, 6, 7, 8, 9])
+        cache.resize(max_bytes=30)
+        self.assertEqual(list(cache.entries), [7, 8, 9])
+        self.assertEqual(cache.bytes, 30)
+
+
+class CalculatorCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.calc = Calculator()
+        self.calc.output = self.output
+        self.lines = []
+        load_default_modules(self.calc)
+        self.cache = self.calc.result_cache
+
+    def output(self, text):
+        self.lines.append(text)
+
+    def results(self):
+        return [str(value) for value in self.calc.stack.stack]
+
+    def test_hit(self):
+        self.calc.parse_input('2 sqrt 2 sqrt')
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        self.assertEqual(len(self.cache), 1)
+
+    def test_equal_values_kept_apart(self):
+        self.calc.parse_input('1 sqrt 1.0 sqrt 1 sqrt')
+        self.assertEqual(self.results(), ['1', '1.0', '1'])
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_invalidate_prec(self):
+        self.calc.parse_input('2 sqrt prec 10 2 sqrt prec 28 2 sqrt')
+        self.assertEqual(self.results(), [
+            '1.414213562373095048801688724', '1.414213562',
+            '1.414213562373095048801688724'])
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+
+    def test_invalidate_rounding(self):
+        context = self.calc.get_module('decimal').context
+        self.calc.parse_input('1 sin')
+        context.rounding = decimal.ROUND_UP
+        self.calc.parse_input('1 sin')
+        self.assertEqual(self.results(), [
+            '0.8414709848078965066525023216',
+            '0.8414709848078965066525023217'])
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 2))
+
+    def test_context_keys_registered(self):
+        self.assertEqual(len(self.calc.context_keys), 1)
+        self.calc.unload_module_by_name('decimal')
+        self.assertEqual(self.calc.context_keys, [])
+
+    def test_cacheclear(self):
+        self.calc.parse_input('2 sqrt 2 sqrt')
+        self.calc.parse_input('cacheclear')
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 0))
+        self.calc.parse_input('2 sqrt')
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 1))
+
+    def test_cache_show(self):
+        self.calc.parse_input('2 sqrt cache?')
+        self.assertEqual(len(self.lines), 1)
+        self.assertTrue(self.lines[0].startswith('result cache: 1 of 1024'))
+
+    def test_cachelimit(self):
+        self.calc.parse_input('2 sqrt 3 sqrt 5 sqrt')
+        self.calc.parse_input('cachelimit entries 2')
+        self.assertEqual(self.cache.max_entries, 2)
+        self.assertEqual(len(self.cache), 2)
+
+        self.calc.parse_input('cachelimit bytes 0')
+        self.assertEqual(self.cache.max_bytes, 0)
+        self.assertEqual(len(self.cache), 0)
+
+        self.calc.parse_input('cachelimit bytes 4096 cachelimit entries 0')
+        self.calc.parse_input('2 sqrt')
+        self.assertEqual(len(self.cache), 0)
+
+    def test_cachelimit_invalid(self):
+        for line in ['cachelimit', 'cachelimit size 10',
+                     'cachelimit entries', 'cachelimit entries many',
+                     'cachelimit bytes -1']:
+            with self.subTest(line=line):
+                with self.assertRaises(CalculatorError):
+                    self.calc.parse_input(line)
+
+
+if __name__ == '__main__':
+    unittest.main()
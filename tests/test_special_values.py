@@ -0,0 +1,95 @@
+# littlecalc
+# Copyright (C) 2017  Maximilian Timmerkamp
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import decimal
+import unittest
+
+from littlecalc.modules.decimal import DecimalModule
+
+
+NAN = decimal.Decimal('NaN')
+INF = decimal.Decimal('Infinity')
+
+
+class SpecialValueTest(unittest.TestCase):
+    """Transcendental functions of NaN, infinite and huge arguments."""
+
+    def setUp(self):
+        self.context = decimal.localcontext()
+        ctx = self.context.__enter__()
+        ctx.prec = 28
+
+    def tearDown(self):
+        self.context.__exit__(None, None, None)
+
+    def test_inverse_trig_nan(self):
+        for name, func in [('arctan', DecimalModule.arctan),
+                           ('arcsin', DecimalModule.arcsin),
+                           ('arccos', DecimalModule.arccos)]:
+            with self.subTest(func=name):
+                with self.assertRaises(decimal.InvalidOperation):
+                    func(NAN)
+
+    def test_arctan_infinity(self):
+        half_pi = DecimalModule.arctan(decimal.Decimal(1)) * 2
+        self.assertEqual(DecimalModule.arctan(INF), half_pi)
+        self.assertEqual(DecimalModule.arctan(-INF), -half_pi)
+
+    def test_hyperbolic_infinity(self):
+        self.assertEqual(DecimalModule.sinh(INF), INF)
+        self.assertEqual(DecimalModule.sinh(-INF), -INF)
+        self.assertEqual(DecimalModule.cosh(INF), INF)
+        self.assertEqual(DecimalModule.cosh(-INF), INF)
+        self.assertEqual(DecimalModule.tanh(INF), 1)
+        self.assertEqual(DecimalModule.tanh(-INF), -1)
+        self.assertEqual(DecimalModule.coth(-INF), -1)
+
+    def test_hyperbolic_large_arguments(self):
+        # e^{-x} underflows to zero for these arguments
+        for argument in ['1000', '1000000']:
+            x = decimal.Decimal(argument)
+            with self.subTest(x=x):
+                self.assertEqual(DecimalModule.sinh(-x),
+                                 -DecimalModule.sinh(x))
+                self.assertEqual(DecimalModule.cosh(-x),
+                                 DecimalModule.cosh(x))
+                self.assertEqual(DecimalModule.tanh(-x), -1)
+                self.assertEqual(DecimalModule.coth(-x), -1)
+        self.assertEqual(str(DecimalModule.cosh(decimal.Decimal(-1000)))[:12],
+                         '9.8503555700')
+
+    def test_logarithm_nan(self):
+        # NaN propagates independently of the precision, which selects
+        # the AGM logarithm at and above dmath.LN_AGM_THRESHOLD
+        for prec in [28, 200]:
+            for name, func in [('ln', DecimalModule.ln),
+                               ('log2', DecimalModule.log2),
+                               ('arcsinh', DecimalModule.arcsinh)]:
+                with self.subTest(func=name, prec=prec):
+                    with decimal.localcontext() as ctx:
+                        ctx.prec = prec
+                        self.assertTrue(func(NAN).is_nan())
+
+    def test_exact_results_not_padded(self):
+        zero = decimal.Decimal(0)
+        self.assertEqual(str(DecimalModule.cos(zero)), '1')
+        self.assertEqual(str(DecimalModule.cosh(zero)), '1')
+        self.assertEqual(str(DecimalModule.arccos(decimal.Decimal(1))), '0')
+        self.assertEqual(str(DecimalModule.tanh(-INF)), '-1')
+
+
+if __name__ == '__main__':
+    unittest.main()
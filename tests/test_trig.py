@@ -0,0 +1,73 @@
+# littlecalc
+# Copyright (C) 2017  Maximilian Timmerkamp
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import decimal
+import math
+import unittest
+
+from littlecalc.modules.decimal import DecimalModule
+
+
+ARGUMENTS = ['0.5', '1', '2', '3', '4', '10', '100', '12345.678']
+
+FUNCTIONS = [
+    ('sin', DecimalModule.sin, math.sin),
+    ('cos', DecimalModule.cos, math.cos),
+    ('tan', DecimalModule.tan, math.tan),
+    ('cot', DecimalModule.cot, lambda x: 1 / math.tan(x)),
+]
+
+
+class NegativeArgumentTest(unittest.TestCase):
+    """sin, cos, tan and cot of negative arguments, which are reduced to a
+    negative multiple of pi/2."""
+
+    def setUp(self):
+        self.context = decimal.localcontext()
+        ctx = self.context.__enter__()
+        ctx.prec = 28
+
+    def tearDown(self):
+        self.context.__exit__(None, None, None)
+
+    def test_compare_with_math(self):
+        for name, func, reference in FUNCTIONS:
+            for argument in ARGUMENTS:
+                x = -decimal.Decimal(argument)
+                with self.subTest(func=name, x=x):
+                    expected = reference(float(x))
+                    self.assertAlmostEqual(
+                        float(func(x)), expected,
+                        delta=1e-9 * max(1, abs(expected)))
+
+    def test_symmetry(self):
+        for argument in ARGUMENTS:
+            x = decimal.Decimal(argument)
+            with self.subTest(x=x):
+                self.assertEqual(DecimalModule.sin(-x), -DecimalModule.sin(x))
+                self.assertEqual(DecimalModule.cos(-x), DecimalModule.cos(x))
+                self.assertEqual(DecimalModule.tan(-x), -DecimalModule.tan(x))
+                self.assertEqual(DecimalModule.cot(-x), -DecimalModule.cot(x))
+
+    def test_known_values(self):
+        self.assertEqual(str(DecimalModule.sin(decimal.Decimal(-1)))[:12],
+                         '-0.841470984')
+        self.assertEqual(str(DecimalModule.cos(decimal.Decimal(-4)))[:12],
+                         '-0.653643620')
+
+
+if __name__ == '__main__':
+    unittest.main()